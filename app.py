@@ -4,16 +4,65 @@ import json
 import time
 import re
 import shutil
+import copy
+import hashlib
+import logging
+import tempfile
+import traceback
 from io import StringIO
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from src.abstractor import TitleAbstractor
-from src.renderer import render_markdown
+from src.pdf_processor import PDFProcessor
+from src.file_uploader import FileUploader
+from src.chain_analyzer import ChainAnalyzer
+from src.relationship_detector import RelationshipDetector
+from src.chain_builder import ChainBuilder
+from deduplication import deduplicate_inventory, deduplicate_documents
+from modules.edit_interface import render_edit_interface
+from modules.timeline_view import render_timeline
+from modules.chain_visualization import render_chain_visualization
+from modules.chain_detail_view import render_chain_detail_view
+from modules.pdf_viewer import render_pdf_viewer
+from modules.chatbot import render_chatbot
+from modules.abstract_data import load_abstract_data, abstract_version, cached_render
+from config.prompts import BASE_PROMPT, DOC_TYPE_PROMPTS, get_combined_prompt
 from database import Database
 
 load_dotenv()
 
+# Module loggers (e.g. deduplication) report summaries at INFO; per-item detail is DEBUG
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(name)s %(levelname)s %(message)s')
+
+# Pass 2 extractions are independent Gemini calls against the same uploaded file
+PASS2_MAX_WORKERS = 8
+
+# Abstract viewer modes and their selector labels
+VIEW_MODES = {
+    'view': "👁️ View",
+    'edit': "✏️ Edit",
+    'chain': "🔗 Chain Analysis",
+    'pdf': "📄 PDF",
+    'chat': "💬 Chat",
+    'log': "📋 Log"
+}
+
+# Abstracts fetched per "Load more" click in the history view
+HISTORY_PAGE_SIZE = 50
+
+# Per-upload processing logs are streamed here while a document is processed
+LOG_DIR = "logs"
+
+# Patterns used by the Settings save handlers to rewrite config/prompts.py.
+# Kept here rather than in prompts.py so the rewrite can never match them.
+BASE_PROMPT_RE = re.compile(r'BASE_PROMPT = """.*?"""', re.DOTALL)
+DOC_TYPE_PROMPT_RES = {
+    doc_type: re.compile(f'"{doc_type}": """.*?"""', re.DOTALL)
+    for doc_type in DOC_TYPE_PROMPTS
+}
+
 st.set_page_config(page_title="Title Abstractor", page_icon="📄", layout="wide")
 
 @st.cache_resource
@@ -26,6 +75,56 @@ def init_system():
 
 abstractor, db = init_system()
 
+# A run that ended early (st.rerun(), st.stop() or an exception) never reached
+# the remove_session() at the bottom, and st.rerun() reuses its thread
+db.remove_session()
+
+# Prompts are read at startup, so a prompt edited in Settings (or a different
+# model) only takes effect after a restart. Keying the cached Pass 1 result on
+# them keeps a restart from replaying output produced under the old ones
+PASS1_PROMPT_SHA256 = hashlib.sha256(
+    f"{abstractor.gemini.model.model_name}\n{abstractor.combined_instructions}".encode()
+).hexdigest()
+
+@st.cache_data(persist="disk", max_entries=200, show_spinner=False)
+def cached_inventory(pdf_sha256, page_count, prompt_sha256, _file_info):
+    """Pass 1 result keyed on PDF content and prompt so re-uploads skip the Gemini call"""
+    return abstractor.extract_all_in_one(_file_info, page_count)
+
+def _time_metric_values(time_metrics):
+    """(ai_min, manual_min, saved_min, saved_pct, cost_saved, hourly_rate) from review.timeMetrics"""
+    return (
+        time_metrics.get('aiProcessingMinutes', 0),
+        time_metrics.get('manualEstimateMinutes', 0),
+        time_metrics.get('timeSavedMinutes', 0),
+        time_metrics.get('timeSavedPercent', 0),
+        time_metrics.get('costSaved', 0),
+        time_metrics.get('hourlyRate', 23)
+    )
+
+@st.cache_data(max_entries=500, show_spinner=False)
+def chain_doc_markdown(abstract_id, version, doc_id, _doc):
+    """Chain hierarchy detail line for one document; (abstract_id, version) already identifies _doc"""
+    return f"""
+                                        **Document #{doc_id}:** {_doc.get('documentType', 'Unknown')}
+                                        - Date: {_doc.get('dates', {}).get('recordDate', 'Unknown')}
+                                        - From: {', '.join(_doc.get('parties', {}).get('from', ['Unknown']))}
+                                        - To: {', '.join(_doc.get('parties', {}).get('to', ['Unknown']))}
+                                        - Recording: {_doc.get('recording', {}).get('locationInstrumentNumber', 'Unknown')}
+                                        """
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def log_stats(abstract_id, log_length, _log):
+    """(lines, warnings, errors) in a processing log, counted in one pass"""
+    lines = warnings = errors = 0
+    for line in _log.split('\n'):
+        lines += 1
+        if '[ERROR]' in line:
+            errors += 1
+        if '[WARNING]' in line:
+            warnings += 1
+    return lines, warnings, errors
+
 # Initialize session state
 if 'current_abstract_id' not in st.session_state:
     st.session_state.current_abstract_id = None
@@ -33,27 +132,54 @@ if 'view_mode' not in st.session_state:
     st.session_state.view_mode = 'view'
 if 'working_json' not in st.session_state:
     st.session_state.working_json = None
+if 'expanded_chains' not in st.session_state:
+    st.session_state.expanded_chains = set()
+
+# Navigation callbacks - these run before the rerun a click already
+# triggers, so every widget renders with the new state without st.rerun()
+def open_view(view_mode, abstract_id=None):
+    st.session_state.current_abstract_id = abstract_id
+    st.session_state.view_mode = view_mode
+    if view_mode == 'history':
+        st.session_state.history_cursors = [None]
+
+def load_more_history(cursor):
+    st.session_state.history_cursors.append(cursor)
+
+def new_abstract():
+    open_view('view')
+    st.session_state.working_json = None
+
+def set_mode(view_mode):
+    st.session_state.view_mode = view_mode
+
+def start_editing(abstract_id):
+    st.session_state.view_mode = 'edit'
+    # The editor mutates its copy; the loaded data is shared by every view
+    st.session_state.working_json = copy.deepcopy(load_abstract_data(db.get_abstract(abstract_id)))
+    # Taken by the editor on its first render
+    st.session_state.working_json_hash = None
+
+def toggle_chain(chain_id):
+    st.session_state.expanded_chains ^= {chain_id}
+
+def select_mode(abstract_id):
+    mode = st.session_state.mode_selector
+    if mode == 'edit':
+        start_editing(abstract_id)
+    else:
+        set_mode(mode)
 
 # Header with actions
 col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
 with col1:
     st.title("📄 Title Abstractor")
 with col2:
-    if st.button("🆕 New Abstract", use_container_width=True):
-        st.session_state.current_abstract_id = None
-        st.session_state.view_mode = 'view'
-        st.session_state.working_json = None
-        st.rerun()
+    st.button("🆕 New Abstract", use_container_width=True, on_click=new_abstract)
 with col3:
-    if st.button("📚 View History", use_container_width=True):
-        st.session_state.current_abstract_id = None
-        st.session_state.view_mode = 'history'
-        st.rerun()
+    st.button("📚 View History", use_container_width=True, on_click=open_view, args=('history',))
 with col4:
-    if st.button("⚙️ Settings", use_container_width=True):
-        st.session_state.current_abstract_id = None
-        st.session_state.view_mode = 'settings'
-        st.rerun()
+    st.button("⚙️ Settings", use_container_width=True, on_click=open_view, args=('settings',))
 
 st.divider()
 
@@ -62,7 +188,15 @@ if st.session_state.view_mode == 'history':
     # HISTORY VIEW
     st.subheader("Abstract History")
     
-    abstracts = db.get_all_abstracts()
+    # One keyset-paginated query per loaded page
+    if 'history_cursors' not in st.session_state:
+        st.session_state.history_cursors = [None]
+    
+    abstracts = []
+    page = []
+    for cursor in st.session_state.history_cursors:
+        page = db.get_abstracts_page(before=cursor, limit=HISTORY_PAGE_SIZE)
+        abstracts.extend(page)
     
     if not abstracts:
         st.info("No abstracts yet. Click 'New Abstract' to get started!")
@@ -75,17 +209,18 @@ if st.session_state.view_mode == 'history':
                 with col2:
                     st.metric("Cost", f"${abstract.cost_estimate:.2f}")
                 with col3:
-                    st.metric("Documents", abstract.json_data.count('"documentType"') if abstract.json_data else 0)
+                    st.metric("Documents", abstract.document_count or 0)
                 with col4:
                     if abstract.is_edited:
                         st.metric("Status", "✏️ Edited")
                     else:
                         st.metric("Status", "Original")
                 
-                if st.button("Open This Abstract", key=f"open_{abstract.id}"):
-                    st.session_state.current_abstract_id = abstract.id
-                    st.session_state.view_mode = 'view'
-                    st.rerun()
+                st.button("Open This Abstract", key=f"open_{abstract.id}", on_click=open_view, args=('view', abstract.id))
+        
+        if len(page) == HISTORY_PAGE_SIZE:
+            last = page[-1]
+            st.button("Load more", on_click=load_more_history, args=((last.created_at, last.id),))
 
 elif st.session_state.view_mode == 'settings':
     # SETTINGS VIEW
@@ -97,8 +232,6 @@ elif st.session_state.view_mode == 'settings':
         st.markdown("### Prompt Management")
         st.caption("Customize extraction prompts for different document types")
         
-        from config.prompts import BASE_PROMPT, DOC_TYPE_PROMPTS, get_combined_prompt
-        
         # Base prompt editor
         with st.expander("📝 Base Prompt (Core Instructions)", expanded=False):
             edited_base = st.text_area(
@@ -118,15 +251,19 @@ elif st.session_state.view_mode == 'settings':
                 with open("config/prompts.py", "r") as f:
                     content = f.read()
                 
-                # Replace BASE_PROMPT
-                pattern = r'BASE_PROMPT = """.*?"""'
-                new_content = re.sub(pattern, f'BASE_PROMPT = """{edited_base}"""', content, flags=re.DOTALL)
-                
-                with open("config/prompts.py", "w") as f:
-                    f.write(new_content)
+                # Replace BASE_PROMPT - callback form so backslashes in the
+                # edited text are not parsed as group references
+                replacement = f'BASE_PROMPT = """{edited_base}"""'
+                new_content, replaced = BASE_PROMPT_RE.subn(lambda m: replacement, content, count=1)
                 
-                st.success("✓ Base prompt updated! Restart the app to apply changes.")
-                st.info("Run: `streamlit run app.py` to reload")
+                if replaced:
+                    with open("config/prompts.py", "w") as f:
+                        f.write(new_content)
+                    
+                    st.success("✓ Base prompt updated! Restart the app to apply changes.")
+                    st.info("Run: `streamlit run app.py` to reload")
+                else:
+                    st.error("Could not find BASE_PROMPT in config/prompts.py")
         
         st.divider()
         
@@ -152,14 +289,16 @@ elif st.session_state.view_mode == 'settings':
                         content = f.read()
                     
                     # Replace specific doc type prompt
-                    pattern = f'"{doc_type}": """.*?"""'
                     replacement = f'"{doc_type}": """{edited_prompt}"""'
-                    new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-                    
-                    with open("config/prompts.py", "w") as f:
-                        f.write(new_content)
+                    new_content, replaced = DOC_TYPE_PROMPT_RES[doc_type].subn(lambda m: replacement, content, count=1)
                     
-                    st.success(f"✓ {doc_type.title()} prompt updated! Restart to apply.")
+                    if replaced:
+                        with open("config/prompts.py", "w") as f:
+                            f.write(new_content)
+                        
+                        st.success(f"✓ {doc_type.title()} prompt updated! Restart to apply.")
+                    else:
+                        st.error(f"Could not find the {doc_type} prompt in config/prompts.py")
         
         st.divider()
         
@@ -172,7 +311,7 @@ elif st.session_state.view_mode == 'settings':
         )
         
         if st.button("Generate Preview"):
-            combined = get_combined_prompt(doc_types)
+            combined = get_combined_prompt(tuple(sorted(doc_types)))
             st.code(combined, language="markdown")
             st.caption(f"Total length: {len(combined)} characters")
     
@@ -248,41 +387,56 @@ elif st.session_state.current_abstract_id is None:
         if st.button("Process Document", type="primary", use_container_width=True):
             temp_path = f"temp_{uploaded_file.name}"
             
+            # Stream in 1 MiB chunks rather than materializing the whole upload
+            uploaded_file.seek(0)
             with open(temp_path, 'wb') as f:
-                f.write(uploaded_file.getbuffer())
+                shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
+            uploaded_file.seek(0)
+            pdf_sha256 = hashlib.file_digest(uploaded_file, 'sha256').hexdigest()
             
-            # Initialize processing log
-            processing_log = []
+            # Initialize processing log - written line by line so the partial
+            # log survives a crash and memory stays bounded on long jobs. Each
+            # run gets its own file, kept only if the abstract is never saved
+            os.makedirs(LOG_DIR, exist_ok=True)
+            log_file = tempfile.NamedTemporaryFile(
+                'w', buffering=1, encoding='utf-8', dir=LOG_DIR,
+                prefix=f"{uploaded_file.name}_", suffix='.log', delete=False
+            )
+            log_path = log_file.name
+            log_saved = False
             
             def log_message(msg, level="INFO"):
                 timestamp = datetime.now().strftime('%H:%M:%S')
                 log_entry = f"[{timestamp}] [{level}] {msg}"
-                processing_log.append(log_entry)
+                log_file.write(log_entry + "\n")
                 return msg
             
             with st.status("Processing document...", expanded=True) as status:
                 try:
-                    # Convert PDF
-                    st.write(log_message("📄 Converting PDF to images..."))
-                    from src.pdf_processor import PDFProcessor
+                    # Count pages from the PDF metadata; Gemini reads the file
+                    # itself, so the pages are never rasterized here
+                    st.write(log_message("📄 Reading PDF..."))
                     processor = PDFProcessor()
-                    images = processor.pdf_to_images(temp_path)
-                    st.write(log_message(f"✓ Converted {len(images)} pages"))
+                    page_count = processor.get_page_count(temp_path)
+                    st.write(log_message(f"✓ Found {page_count} pages"))
                     
                     # Upload
                     st.write(log_message("☁️ Uploading to Gemini Files API..."))
-                    from src.file_uploader import FileUploader
                     uploader = FileUploader(os.getenv('GOOGLE_API_KEY'))
-                    file_info = uploader.upload_pdf(temp_path, uploaded_file.name)
+                    file_info = uploader.upload_pdf_stream(uploaded_file, uploaded_file.name)
                     st.write(log_message(f"✓ Uploaded successfully (File ID: {file_info['name']})"))
                     
-                    # Pass 1: Inventory
-                    st.write(log_message("🔍 **PASS 1:** Creating document inventory..."))
-                    inventory = abstractor._get_inventory(file_info, len(images))
+                    # Pass 1: Inventory and details in a single combined call
+                    start_time = time.time()
+                    st.write(log_message("🔍 **PASS 1:** Extracting document inventory and details..."))
+                    try:
+                        inventory = cached_inventory(pdf_sha256, page_count, PASS1_PROMPT_SHA256, file_info)
+                    except Exception as e:
+                        st.write(log_message(f"⚠️ {str(e)} - falling back to inventory only", "WARNING"))
+                        inventory = abstractor._get_inventory(file_info, page_count)
                     st.write(log_message(f"✓ Found {len(inventory)} documents"))
                     
                     # Deduplicate inventory
-                    from deduplication import deduplicate_inventory
                     inventory = deduplicate_inventory(inventory)
                     st.write(log_message(f"✓ After deduplication: {len(inventory)} unique documents:"))
                     
@@ -291,40 +445,59 @@ elif st.session_state.current_abstract_id is None:
                         msg = f"  {i}. {doc_info.get('type', 'Unknown')} (pages {pages.get('start', '?')}-{pages.get('end', '?')})"
                         st.write(log_message(msg))
                     
-                    # Pass 2: Detailed extraction with timing
-                    st.write("")
-                    st.write(log_message("🔍 **PASS 2:** Extracting document details..."))
-                    
-                    start_time = time.time()
-                    all_documents = []
-                    
-                    progress_bar = st.progress(0)
+                    # Pass 2: Per-document extraction only for documents the
+                    # combined call did not return usable details for
+                    extracted = {}
+                    pending = []
                     for i, doc_info in enumerate(inventory, 1):
-                        doc_type = doc_info.get('type', 'Unknown')
-                        pages = doc_info.get('pages', {})
-                        
-                        status_text = st.empty()
-                        msg = f"  Processing {i}/{len(inventory)}: {doc_type} (pages {pages.get('start', '?')}-{pages.get('end', '?')})..."
-                        status_text.write(log_message(msg))
-                        
-                        try:
-                            doc_detail = abstractor._extract_document_detail(file_info, doc_info, i)
-                            doc_detail['pageLocation'] = pages
-                            all_documents.append(doc_detail)
-                            msg = f"  ✓ {i}/{len(inventory)}: {doc_type} complete"
-                            status_text.write(log_message(msg))
-                        except Exception as e:
-                            msg = f"  ✗ {i}/{len(inventory)}: {doc_type} failed - {str(e)}"
-                            status_text.write(log_message(msg, "ERROR"))
+                        doc_detail = doc_info.pop('detail', None)
+                        if doc_detail:
+                            doc_detail['pageLocation'] = doc_info.get('pages', {})
+                            extracted[i] = doc_detail
+                        else:
+                            pending.append((i, doc_info))
+                    
+                    if pending:
+                        st.write("")
+                        st.write(log_message(f"🔍 **PASS 2:** Extracting details for {len(pending)} remaining documents..."))
                         
-                        progress_bar.progress(i / len(inventory))
+                        progress_bar = st.progress(0)
+                        # Each extraction is a network-bound Gemini call, so run them
+                        # concurrently and report progress from the main thread
+                        with ThreadPoolExecutor(max_workers=PASS2_MAX_WORKERS) as executor:
+                            futures = {}
+                            for i, doc_info in pending:
+                                doc_type = doc_info.get('type', 'Unknown')
+                                pages = doc_info.get('pages', {})
+                                msg = f"  Processing {i}/{len(inventory)}: {doc_type} (pages {pages.get('start', '?')}-{pages.get('end', '?')})..."
+                                st.write(log_message(msg))
+                                future = executor.submit(abstractor._extract_document_detail, file_info, doc_info, i)
+                                futures[future] = (i, doc_info)
+                            
+                            for completed, future in enumerate(as_completed(futures), 1):
+                                i, doc_info = futures[future]
+                                doc_type = doc_info.get('type', 'Unknown')
+                                
+                                try:
+                                    doc_detail = future.result()
+                                    doc_detail['pageLocation'] = doc_info.get('pages', {})
+                                    extracted[i] = doc_detail
+                                    msg = f"  ✓ {i}/{len(inventory)}: {doc_type} complete"
+                                    st.write(log_message(msg))
+                                except Exception as e:
+                                    msg = f"  ✗ {i}/{len(inventory)}: {doc_type} failed - {str(e)}"
+                                    st.write(log_message(msg, "ERROR"))
+                                
+                                progress_bar.progress(completed / len(pending))
+                    
+                    # Restore inventory order regardless of completion order
+                    all_documents = [extracted[i] for i in sorted(extracted)]
                     
                     st.write(log_message(f"✓ Extracted {len(all_documents)} documents"))
                     
                     # Pass 2.5: Deduplicate extracted documents
                     st.write("")
                     st.write(log_message("🔍 **DEDUPLICATION:** Removing duplicate documents..."))
-                    from deduplication import deduplicate_documents
                     all_documents = deduplicate_documents(all_documents)
                     st.write(log_message(f"✓ After deduplication: {len(all_documents)} unique documents"))
                     
@@ -335,7 +508,6 @@ elif st.session_state.current_abstract_id is None:
                     # Pass 3: Chain analysis
                     st.write("")
                     st.write(log_message("🔗 **PASS 3:** Analyzing chain of title..."))
-                    from src.chain_analyzer import ChainAnalyzer
                     analyzer = ChainAnalyzer()
                     sorted_docs, warnings = analyzer.analyze_chain(all_documents)
                     
@@ -350,9 +522,14 @@ elif st.session_state.current_abstract_id is None:
                     processing_time_seconds = time.time() - start_time
                     
                     num_documents = len(sorted_docs)
-                    num_deeds = sum(1 for d in sorted_docs if 'deed' in d.get('documentType', '').lower())
-                    num_mortgages = sum(1 for d in sorted_docs if 'mortgage' in d.get('documentType', '').lower())
-                    total_chars = sum(len(d.get('property', {}).get('legalDescription', '')) for d in sorted_docs)
+                    num_deeds = num_mortgages = total_chars = 0
+                    for d in sorted_docs:
+                        doc_type = d.get('documentType', '').lower()
+                        if 'deed' in doc_type:
+                            num_deeds += 1
+                        if 'mortgage' in doc_type:
+                            num_mortgages += 1
+                        total_chars += len(d.get('property', {}).get('legalDescription', ''))
                     
                     manual_time_minutes = (
                         (num_documents * 4) +
@@ -376,7 +553,7 @@ elif st.session_state.current_abstract_id is None:
                     result = {
                         "source": {"fileName": uploaded_file.name, "county": "", "state": "NY"},
                         "review": {
-                            "totalPagesProcessed": len(images),
+                            "totalPagesProcessed": page_count,
                             "allPagesReviewed": True,
                             "chainWarnings": warnings,
                             "extractionMethod": "two-pass-hybrid",
@@ -398,13 +575,15 @@ elif st.session_state.current_abstract_id is None:
                     
                     st.write("")
                     st.write(log_message("📝 Rendering markdown output..."))
-                    markdown = render_markdown(result)
+                    markdown = cached_render(json.dumps(result, sort_keys=True))
                     st.write(log_message("✓ Markdown generated"))
                     
                     st.write(log_message("💾 Saving to database..."))
                     
-                    # Convert log to string
-                    log_text = "\n".join(processing_log)
+                    # Read back the log written so far
+                    log_file.flush()
+                    with open(log_path, encoding='utf-8') as f:
+                        log_text = f.read().rstrip('\n')
                     
                     abstract_id = db.save_abstract(
                         filename=uploaded_file.name,
@@ -415,17 +594,19 @@ elif st.session_state.current_abstract_id is None:
                         pdf_path=temp_path,
                         processing_log=log_text
                     )
+                    log_saved = True
                     st.write(log_message(f"✓ Saved with ID: {abstract_id}"))
                     
                     # Display time savings summary
                     time_metrics = result.get('review', {}).get('timeMetrics', {})
                     if time_metrics:
+                        ai_min, manual_min, saved_min, saved_pct, saved_cost, rate = _time_metric_values(time_metrics)
                         st.write("")
                         st.write("⏱️  **Time & Cost Savings:**")
-                        st.write(f"  • AI Processing: {time_metrics.get('aiProcessingMinutes', 0)} minutes")
-                        st.write(f"  • Manual Estimate: {time_metrics.get('manualEstimateMinutes', 0)} minutes")
-                        st.write(f"  • Time Saved: {time_metrics.get('timeSavedMinutes', 0)} minutes ({time_metrics.get('timeSavedPercent', 0)}%)")
-                        st.write(f"  • Cost Saved: ${time_metrics.get('costSaved', 0)} (at ${time_metrics.get('hourlyRate', 23)}/hour)")
+                        st.write(f"  • AI Processing: {ai_min} minutes")
+                        st.write(f"  • Manual Estimate: {manual_min} minutes")
+                        st.write(f"  • Time Saved: {saved_min} minutes ({saved_pct}%)")
+                        st.write(f"  • Cost Saved: ${saved_cost} (at ${rate}/hour)")
                     
                     status.update(label="✅ Processing complete!", state="complete")
                     
@@ -440,18 +621,18 @@ elif st.session_state.current_abstract_id is None:
                     log_message(error_msg, "ERROR")
                     status.update(label="❌ Processing failed", state="error")
                     st.error(f"Error: {str(e)}")
-                    import traceback
                     tb = traceback.format_exc()
                     log_message(tb, "ERROR")
                     st.code(tb)
                     
-                    # Save partial log even on failure
-                    log_text = "\n".join(processing_log)
-                    with open(f"error_log_{uploaded_file.name}.txt", "w") as f:
-                        f.write(log_text)
-                    st.warning(f"Error log saved to: error_log_{uploaded_file.name}.txt")
+                    # The partial log is already on disk
+                    st.warning(f"Error log saved to: {log_path}")
                     
                 finally:
+                    log_file.close()
+                    # The saved abstract holds the log; only failed runs keep the file
+                    if log_saved:
+                        os.remove(log_path)
                     if os.path.exists(temp_path):
                         os.remove(temp_path)
 
@@ -471,7 +652,7 @@ else:
     with col1:
         st.metric("Pages", abstract.pages_processed)
     with col2:
-        st.metric("Documents", abstract.json_data.count('"documentType"') if abstract.json_data else 0)
+        st.metric("Documents", abstract.document_count or 0)
     with col3:
         st.metric("Created", abstract.created_at.strftime('%Y-%m-%d'))
     with col4:
@@ -483,72 +664,43 @@ else:
     # Time savings metrics
     if abstract.json_data:
         try:
-            data = json.loads(abstract.json_data)
-            time_metrics = data.get('review', {}).get('timeMetrics', {})
+            time_metrics = db.get_abstract_time_metrics(abstract.id)
             
             if time_metrics:
+                ai_min, manual_min, saved_min, saved_pct, saved_cost, rate = _time_metric_values(time_metrics)
                 st.divider()
                 st.subheader("⏱️ Time & Cost Savings")
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("AI Processing", f"{time_metrics.get('aiProcessingMinutes', 0)} min")
+                    st.metric("AI Processing", f"{ai_min} min")
                 with col2:
-                    st.metric("Manual Estimate", f"{time_metrics.get('manualEstimateMinutes', 0)} min")
+                    st.metric("Manual Estimate", f"{manual_min} min")
                 with col3:
                     st.metric("Time Saved", 
-                             f"{time_metrics.get('timeSavedMinutes', 0)} min",
-                             delta=f"{time_metrics.get('timeSavedPercent', 0)}%")
+                             f"{saved_min} min",
+                             delta=f"{saved_pct}%")
                 with col4:
                     st.metric("Cost Saved", 
-                             f"${time_metrics.get('costSaved', 0)}",
-                             delta=f"at ${time_metrics.get('hourlyRate', 23)}/hr")
+                             f"${saved_cost}",
+                             delta=f"at ${rate}/hr")
         except:
             pass  # If no time metrics, just skip
     
     # Mode selector - UPDATED: Removed Timeline button, renamed Chain to Chain Analysis
     st.divider()
-    mode_col1, mode_col2, mode_col3, mode_col4, mode_col5, mode_col6 = st.columns(6)
-    
-    with mode_col1:
-        if st.button("👁️ View", use_container_width=True, 
-                     type="primary" if st.session_state.view_mode == 'view' else "secondary"):
-            st.session_state.view_mode = 'view'
-            st.rerun()
-    
-    with mode_col2:
-        if st.button("✏️ Edit", use_container_width=True,
-                     type="primary" if st.session_state.view_mode == 'edit' else "secondary"):
-            st.session_state.view_mode = 'edit'
-            if abstract.is_edited and abstract.edited_json_data:
-                st.session_state.working_json = json.loads(abstract.edited_json_data)
-            else:
-                st.session_state.working_json = json.loads(abstract.json_data)
-            st.rerun()
-    
-    with mode_col3:
-        if st.button("🔗 Chain Analysis", use_container_width=True,
-                     type="primary" if st.session_state.view_mode == 'chain' else "secondary"):
-            st.session_state.view_mode = 'chain'
-            st.rerun()
-    
-    with mode_col4:
-        if st.button("📄 PDF", use_container_width=True,
-                     type="primary" if st.session_state.view_mode == 'pdf' else "secondary"):
-            st.session_state.view_mode = 'pdf'
-            st.rerun()
-    
-    with mode_col5:
-        if st.button("💬 Chat", use_container_width=True,
-                     type="primary" if st.session_state.view_mode == 'chat' else "secondary"):
-            st.session_state.view_mode = 'chat'
-            st.rerun()
-    
-    with mode_col6:
-        if st.button("📋 Log", use_container_width=True,
-                     type="primary" if st.session_state.view_mode == 'log' else "secondary"):
-            st.session_state.view_mode = 'log'
-            st.rerun()
+    if st.session_state.view_mode in VIEW_MODES:
+        st.session_state.mode_selector = st.session_state.view_mode
+    st.radio(
+        "Mode",
+        list(VIEW_MODES),
+        format_func=VIEW_MODES.get,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="mode_selector",
+        on_change=select_mode,
+        args=(abstract.id,)
+    )
     
     st.divider()
     
@@ -588,13 +740,12 @@ else:
     
     elif st.session_state.view_mode == 'edit':
         # EDIT MODE
-        from modules.edit_interface import render_edit_interface
         render_edit_interface(abstract, db)
     
     elif st.session_state.view_mode == 'chain':
         # CHAIN ANALYSIS MODE - COMBINED Timeline and Chain Views
         try:
-            data = json.loads(abstract.edited_json_data if abstract.is_edited else abstract.json_data)
+            data = load_abstract_data(abstract)
         except:
             st.error("Could not load abstract data")
             data = None
@@ -607,17 +758,14 @@ else:
             
             with tab1:
                 # Timeline view
-                from modules.timeline_view import render_timeline
-                render_timeline(abstract)
+                render_timeline(abstract, start_editing)
             
             with tab2:
                 # Visual chain diagram
-                from modules.chain_visualization import render_chain_visualization
                 render_chain_visualization(abstract)
             
             with tab3:
                 # Chain details with related documents
-                from modules.chain_detail_view import render_chain_detail_view
                 render_chain_detail_view(abstract)
             
             with tab4:
@@ -630,9 +778,6 @@ else:
                     st.warning("No documents found to analyze.")
                 else:
                     with st.spinner("Analyzing chain of title..."):
-                        from src.relationship_detector import RelationshipDetector
-                        from src.chain_builder import ChainBuilder
-                        
                         # Phase 2: Detect relationships
                         detector = RelationshipDetector()
                         analysis = detector.analyze_all_documents(documents)
@@ -694,14 +839,9 @@ else:
                                 
                                 if st.checkbox(f"Show document details", key=f"details_{node['chain_id']}_{level}"):
                                     for doc_id in node['document_ids']:
-                                        doc = documents[doc_id - 1]
-                                        st.markdown(f"""
-                                        **Document #{doc_id}:** {doc.get('documentType', 'Unknown')}
-                                        - Date: {doc.get('dates', {}).get('recordDate', 'Unknown')}
-                                        - From: {', '.join(doc.get('parties', {}).get('from', ['Unknown']))}
-                                        - To: {', '.join(doc.get('parties', {}).get('to', ['Unknown']))}
-                                        - Recording: {doc.get('recording', {}).get('locationInstrumentNumber', 'Unknown')}
-                                        """)
+                                        st.markdown(chain_doc_markdown(
+                                            abstract.id, abstract_version(abstract), doc_id, documents[doc_id - 1]
+                                        ))
                                 
                                 # Display children with indentation
                                 if node['children']:
@@ -720,22 +860,28 @@ else:
                                 for issue in node['issues']:
                                     st.markdown(f"{indent}  - {issue['message']}")
                             
-                            # Recursively display deeper children
+                            # Deeper levels are only rendered once their parent is expanded
                             if node['children']:
-                                for child in node['children']:
-                                    display_chain_node(child, level + 1, indent + "  ")
+                                expanded = node['chain_id'] in st.session_state.expanded_chains
+                                st.button(
+                                    f"{'Collapse' if expanded else 'Expand'} ({len(node['children'])})",
+                                    key=f"expand_{node['chain_id']}_{level}",
+                                    on_click=toggle_chain,
+                                    args=(node['chain_id'],)
+                                )
+                                if expanded:
+                                    for child in node['children']:
+                                        display_chain_node(child, level + 1, indent + "  ")
                     
                     for node in result['hierarchy']:
                         display_chain_node(node)
     
     elif st.session_state.view_mode == 'pdf':
         # PDF VIEWER MODE
-        from modules.pdf_viewer import render_pdf_viewer
         render_pdf_viewer(abstract, db)
     
     elif st.session_state.view_mode == 'chat':
         # CHATBOT MODE
-        from modules.chatbot import render_chatbot
         render_chatbot(abstract, db, abstractor.gemini)
     
     elif st.session_state.view_mode == 'log':
@@ -744,13 +890,13 @@ else:
         
         if abstract.processing_log:
             # Parse log for statistics
-            log_lines = abstract.processing_log.split('\n')
-            error_count = sum(1 for line in log_lines if '[ERROR]' in line)
-            warning_count = sum(1 for line in log_lines if '[WARNING]' in line)
+            line_count, warning_count, error_count = log_stats(
+                abstract.id, len(abstract.processing_log), abstract.processing_log
+            )
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Log Entries", len(log_lines))
+                st.metric("Total Log Entries", line_count)
             with col2:
                 st.metric("Warnings", warning_count, delta="Issues" if warning_count > 0 else None)
             with col3:
@@ -771,3 +917,6 @@ else:
             )
         else:
             st.info("No processing log available for this abstract (processed before logging was implemented)")
+
+# Close this run's thread-local DB session so it does not outlive the run
+db.remove_session()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 BASE_PROMPT = """You are an AI assistant specializing in real estate title abstracting for New York State. Extract all documents from the provided pages and output structured JSON data.
 
 ## CRITICAL OUTPUT REQUIREMENT
@@ -112,14 +114,13 @@ def get_combined_prompt(enabled_doc_types=None):
     Combine base prompt with enabled document type rules
     """
     if enabled_doc_types is None:
-        enabled_doc_types = ["deed", "mortgage", "judgment"]
-    
-    prompt = BASE_PROMPT
-    
-    for doc_type in enabled_doc_types:
-        if doc_type in DOC_TYPE_PROMPTS:
-            prompt += "\n" + DOC_TYPE_PROMPTS[doc_type]
+        enabled_doc_types = ("deed", "mortgage", "judgment")
     
-    prompt += "\n\nOutput ONLY valid JSON."
-    
-    return prompt
+    # Drop repeats but keep the caller's order, so rules appear as before
+    return _build_combined_prompt(tuple(dict.fromkeys(enabled_doc_types)))
+
+
+@lru_cache(maxsize=32)
+def _build_combined_prompt(enabled_doc_types):
+    fragments = [DOC_TYPE_PROMPTS[t] for t in enabled_doc_types if t in DOC_TYPE_PROMPTS]
+    return "\n".join([BASE_PROMPT, *fragments, "\nOutput ONLY valid JSON."])
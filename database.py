@@ -1,66 +1,159 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean
+from sqlalchemy import create_engine, event, inspect, text, and_, or_, Column, Index, Integer, String, Text, DateTime, Float, Boolean
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import deferred, scoped_session, sessionmaker
 from datetime import datetime
 import json as json_module
+from uuid import uuid4
 import shutil
 import os
 
+try:
+    import orjson
+    
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _dumps = json_module.dumps
+
 Base = declarative_base()
 
+def _fast_copy(src, dst):
+    """Copy a file in the kernel with sendfile where available, else with a 1 MiB buffer"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        copied = False
+        if hasattr(os, 'sendfile'):
+            try:
+                size = os.fstat(fsrc.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                copied = offset == size
+            except OSError:
+                pass
+        if not copied:
+            # sendfile unavailable or cut short - start over in user space
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst, length=1 << 20)
+    shutil.copystat(src, dst)
+
+
 class Abstract(Base):
     __tablename__ = 'abstracts'
     id = Column(Integer, primary_key=True)
     filename = Column(String(255))
     pdf_path = Column(String(512), nullable=True)
-    json_data = Column(Text)
-    edited_json_data = Column(Text, nullable=True)
-    markdown_output = Column(Text)
-    edited_markdown_output = Column(Text, nullable=True)
+    # Large text columns load on first access so list queries stay light
+    json_data = deferred(Column(Text))
+    edited_json_data = deferred(Column(Text, nullable=True))
+    markdown_output = deferred(Column(Text))
+    edited_markdown_output = deferred(Column(Text, nullable=True))
     pages_processed = Column(Integer)
+    document_count = Column(Integer, default=0)
     cost_estimate = Column(Float)
-    processing_log = Column(Text, nullable=True)
+    processing_log = deferred(Column(Text, nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow)
     last_edited_at = Column(DateTime, nullable=True)
     edited_by = Column(String(100), nullable=True)
     is_edited = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index('idx_abstracts_created_at', created_at.desc()),
+        Index('idx_abstracts_is_edited_created_at', is_edited, created_at),
+    )
 
 class Database:
     def __init__(self, db_path='abstracts.db', storage_path='pdf_storage'):
-        self.engine = create_engine(f'sqlite:///{db_path}')
+        # One Database is shared by every Streamlit session thread
+        self.engine = create_engine(
+            f'sqlite:///{db_path}',
+            connect_args={'check_same_thread': False}
+        )
+        event.listen(self.engine, 'connect', self._set_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        self._migrate()
+        # Thread-local sessions instead of one session shared across threads
+        self.session = scoped_session(sessionmaker(bind=self.engine))
         self.storage_path = storage_path
         
         # Create storage directory
         os.makedirs(storage_path, exist_ok=True)
     
+    def remove_session(self):
+        """
+        Close the calling thread's session; objects it loaded are detached after.
+        st.rerun() reruns the script on the same thread, so call this at the
+        start of each run as well as the end, or one run's identity map would
+        carry into the next
+        """
+        self.session.remove()
+    
+    @staticmethod
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed during a write; NORMAL skips the per-commit fsync of the WAL"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+    
+    def _migrate(self):
+        """Add columns introduced after the table was first created"""
+        columns = {c['name'] for c in inspect(self.engine).get_columns('abstracts')}
+        
+        if 'document_count' not in columns:
+            with self.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE abstracts ADD COLUMN document_count INTEGER DEFAULT 0"))
+                
+                # Backfill existing rows from their stored JSON, server-side
+                conn.execute(text(
+                    "UPDATE abstracts SET document_count = "
+                    "CASE WHEN json_valid(json_data) "
+                    "THEN COALESCE(json_array_length(json_data, '$.documents'), 0) "
+                    "ELSE 0 END"
+                ))
+        
+        # create_all() skips indexes on tables that already exist
+        for index in Abstract.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+    
     def save_abstract(self, filename, json_data, markdown, pages, cost, user='system', pdf_path=None, processing_log=None):
         # Copy PDF to permanent storage
         stored_pdf_path = None
-        if pdf_path and os.path.exists(pdf_path):
-            stored_pdf_path = os.path.join(self.storage_path, f"{datetime.utcnow().timestamp()}_{filename}")
-            shutil.copy2(pdf_path, stored_pdf_path)
+        if pdf_path:
+            stored_pdf_path = os.path.join(self.storage_path, f"{uuid4().hex[:8]}_{filename}")
+            try:
+                _fast_copy(pdf_path, stored_pdf_path)
+            except FileNotFoundError:
+                stored_pdf_path = None
         
-        abstract = Abstract(
-            filename=filename,
-            pdf_path=stored_pdf_path,
-            json_data=json_module.dumps(json_data),
-            markdown_output=markdown,
-            pages_processed=pages,
-            cost_estimate=cost,
-            processing_log=processing_log
-        )
-        self.session.add(abstract)
+        return self.save_many([{
+            'filename': filename,
+            'pdf_path': stored_pdf_path,
+            'json_data': _dumps(json_data),
+            'markdown_output': markdown,
+            'pages_processed': pages,
+            'document_count': len(json_data.get('documents', [])),
+            'cost_estimate': cost,
+            'processing_log': processing_log
+        }])[0]
+    
+    def save_many(self, rows):
+        """Insert several abstracts (dicts of Abstract columns) in one transaction, returning their ids"""
+        abstracts = [Abstract(**row) for row in rows]
+        self.session.add_all(abstracts)
         self.session.commit()
-        return abstract.id
+        return [abstract.id for abstract in abstracts]
     
     def update_abstract(self, abstract_id, edited_json, edited_markdown, user='system'):
         abstract = self.session.query(Abstract).filter_by(id=abstract_id).first()
         if abstract:
-            abstract.edited_json_data = json_module.dumps(edited_json)
+            abstract.edited_json_data = _dumps(edited_json)
             abstract.edited_markdown_output = edited_markdown
+            abstract.document_count = len(edited_json.get('documents', []))
             abstract.last_edited_at = datetime.utcnow()
             abstract.edited_by = user
             abstract.is_edited = True
@@ -71,9 +164,31 @@ class Database:
     def get_all_abstracts(self):
         return self.session.query(Abstract).order_by(Abstract.created_at.desc()).all()
     
+    def get_abstracts_page(self, before=None, limit=50):
+        """
+        Newest-first page of abstracts using a keyset cursor rather than OFFSET
+        before: (created_at, id) of the last row on the previous page, or None
+        """
+        query = self.session.query(Abstract)
+        if before:
+            created_at, abstract_id = before
+            query = query.filter(or_(
+                Abstract.created_at < created_at,
+                and_(Abstract.created_at == created_at, Abstract.id < abstract_id)
+            ))
+        return query.order_by(Abstract.created_at.desc(), Abstract.id.desc()).limit(limit).all()
+    
     def get_abstract(self, abstract_id):
         return self.session.query(Abstract).filter_by(id=abstract_id).first()
     
+    def get_abstract_time_metrics(self, abstract_id):
+        """review.timeMetrics extracted by SQLite so the full JSON is never parsed"""
+        metrics_json = self.session.execute(
+            text("SELECT json_extract(json_data, '$.review.timeMetrics') FROM abstracts WHERE id = :id"),
+            {'id': abstract_id}
+        ).scalar()
+        return json_module.loads(metrics_json) if metrics_json else {}
+    
     def get_pdf_path(self, abstract_id):
         abstract = self.get_abstract(abstract_id)
         if abstract and abstract.pdf_path and os.path.exists(abstract.pdf_path):
@@ -1,9 +1,15 @@
 """
 Deduplication utilities for Pass 1 (inventory) and Pass 2 (extracted documents)
 """
-from difflib import SequenceMatcher
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from rapidfuzz import fuzz
+import logging
 import re
 
+log = logging.getLogger(__name__)
+
 
 def deduplicate_inventory(inventory):
     if not inventory:
@@ -11,8 +17,11 @@ def deduplicate_inventory(inventory):
     
     unique_docs = []
     seen_signatures = set()
+    # doc type -> kept page ranges sorted by start page, for the overlap sweep
+    ranges_by_type = defaultdict(_PageRangeIndex)
     
     for doc in inventory:
+        # Type and pages are normalized once here and shared by both checks below
         doc_type = doc.get('type', '').lower().strip()
         pages = doc.get('pages', {})
         start_page = pages.get('start')
@@ -22,46 +31,63 @@ def deduplicate_inventory(inventory):
             unique_docs.append(doc)
             continue
         
-        exact_signature = f"{doc_type}|{start_page}|{end_page}"
+        exact_signature = (doc_type, start_page, end_page)
         
         if exact_signature in seen_signatures:
-            print(f"  [DEDUP PASS 1] Skipping duplicate: {doc_type} (pages {start_page}-{end_page})")
+            log.debug("[DEDUP PASS 1] Skipping duplicate: %s (pages %s-%s)", doc_type, start_page, end_page)
             continue
         
+        ranges = ranges_by_type[doc_type]
         is_duplicate = False
-        for existing_doc in unique_docs:
-            if _is_likely_same_document_inventory(doc, existing_doc):
-                print(f"  [DEDUP PASS 1] Skipping likely duplicate: {doc_type} (pages {start_page}-{end_page})")
+        for existing_start, existing_end in ranges.overlapping(start_page, end_page):
+            if _is_majority_overlap(start_page, end_page, existing_start, existing_end):
+                log.debug("[DEDUP PASS 1] Skipping likely duplicate: %s (pages %s-%s)", doc_type, start_page, end_page)
                 is_duplicate = True
                 break
         
         if not is_duplicate:
             seen_signatures.add(exact_signature)
+            ranges.add(start_page, end_page)
             unique_docs.append(doc)
     
     removed_count = len(inventory) - len(unique_docs)
     if removed_count > 0:
-        print(f"  [DEDUP PASS 1] Removed {removed_count} duplicate(s) from inventory")
+        log.info("[DEDUP PASS 1] Removed %d duplicate(s) from inventory", removed_count)
     
     return unique_docs
 
 
-def _is_likely_same_document_inventory(doc1, doc2):
-    type1 = doc1.get('type', '').lower().strip()
-    type2 = doc2.get('type', '').lower().strip()
-    
-    if type1 != type2:
-        return False
-    
-    pages1 = doc1.get('pages', {})
-    pages2 = doc2.get('pages', {})
-    
-    start1, end1 = pages1.get('start'), pages1.get('end')
-    start2, end2 = pages2.get('start'), pages2.get('end')
-    
-    if not all([start1, end1, start2, end2]):
-        return False
+class _PageRangeIndex:
+    """
+    Kept inventory page ranges of one document type, sorted by start page.
+    Only ranges that intersect [start, end] are returned, found by bisecting
+    on start pages widened by the longest range seen.
+    """
     
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.max_span = 0
+    
+    def add(self, start, end):
+        # Reversed ranges can never exceed the 50% overlap threshold
+        if end < start:
+            return
+        idx = bisect_right(self.starts, start)
+        self.starts.insert(idx, start)
+        self.ends.insert(idx, end)
+        self.max_span = max(self.max_span, end - start)
+    
+    def overlapping(self, start, end):
+        if end < start:
+            return []
+        lo = bisect_left(self.starts, start - self.max_span)
+        hi = bisect_right(self.starts, end)
+        return zip(self.starts[lo:hi], self.ends[lo:hi])
+
+
+def _is_majority_overlap(start1, end1, start2, end2):
+    """Whether two page ranges overlap by more than half of either one"""
     overlap = not (end1 < start2 or end2 < start1)
     
     if overlap:
@@ -86,29 +112,86 @@ def deduplicate_documents(documents):
         return documents
     
     unique_docs = []
+    unique_views = []
+    # index into unique_docs -> [min_start, max_end] over its merged page locations
+    page_bounds = {}
+    # recording -> canonical type -> indexes into unique_docs ('' = field missing)
+    blocks = defaultdict(lambda: defaultdict(list))
     
     for i, doc in enumerate(documents):
         is_duplicate = False
+        view = _precompute(doc)
         
-        for j, existing_doc in enumerate(unique_docs):
-            similarity_score = _calculate_document_similarity(doc, existing_doc)
+        for j in _candidate_indexes(blocks, view.recording, view.doc_type_canon):
+            existing_doc = unique_docs[j]
+            similarity_score = _calculate_document_similarity(view, unique_views[j])
             
             if similarity_score >= 0.85:
-                print(f"  [DEDUP PASS 2] Document {i+1} is {similarity_score*100:.0f}% similar to document {j+1} - merging")
-                _merge_documents(existing_doc, doc)
+                log.debug("[DEDUP PASS 2] Document %d is %.0f%% similar to document %d - merging", i + 1, similarity_score * 100, j + 1)
+                _merge_documents(existing_doc, doc, page_bounds.setdefault(j, []))
                 is_duplicate = True
                 break
         
         if not is_duplicate:
+            blocks[view.recording][view.doc_type_canon].append(len(unique_docs))
             unique_docs.append(doc)
+            unique_views.append(view)
+    
+    for j, bounds in page_bounds.items():
+        _finalize_page_locations(unique_docs[j], bounds)
     
     removed_count = len(documents) - len(unique_docs)
     if removed_count > 0:
-        print(f"  [DEDUP PASS 2] Removed {removed_count} duplicate document(s)")
+        log.info("[DEDUP PASS 2] Removed %d duplicate document(s)", removed_count)
     
     return unique_docs
 
 
+# Normalized fields compared during Pass 2 dedup, computed once per document.
+# Merging only touches page locations and notes, so a kept document's view
+# never goes stale.
+_DocView = namedtuple('_DocView', [
+    'recording', 'doc_type', 'doc_type_canon', 'date', 'from_set', 'to_set', 'legal_prefix'
+])
+
+
+def _precompute(doc):
+    parties = doc.get('parties', {})
+    doc_type = _normalize_string(doc.get('documentType'))
+    legal = (doc.get('property', {}).get('legalDescription') or '').strip()
+    
+    return _DocView(
+        recording=_normalize_string(doc.get('recording', {}).get('locationInstrumentNumber')),
+        doc_type=doc_type,
+        doc_type_canon=_normalize_doc_type(doc_type) if doc_type else '',
+        date=_normalize_string(doc.get('dates', {}).get('recordDate')),
+        from_set=set(_normalize_string(p) for p in parties.get('from', []) or []),
+        to_set=set(_normalize_string(p) for p in parties.get('to', []) or []),
+        legal_prefix=legal[:500]
+    )
+
+
+def _candidate_indexes(blocks, recording, doc_type):
+    """
+    Indexes of kept documents that could still be duplicates, in keep order.
+    When both documents have a recording number, a mismatch caps the score
+    at 0.6, and a canonical type mismatch caps it at 0.8 - neither can reach
+    the 0.85 threshold. Missing fields are '' and act as wildcards.
+    """
+    recordings = (recording, '') if recording else blocks.keys()
+    
+    candidates = []
+    for rec in recordings:
+        by_type = blocks.get(rec)
+        if not by_type:
+            continue
+        types = (doc_type, '') if doc_type else by_type.keys()
+        for t in types:
+            candidates.extend(by_type.get(t, ()))
+    
+    return sorted(candidates)
+
+
 def _normalize_string(s):
     """Normalize string for comparison: lowercase, strip, remove extra spaces"""
     if not s:
@@ -116,66 +199,54 @@ def _normalize_string(s):
     return ' '.join((s or '').lower().strip().split())
 
 
-def _calculate_document_similarity(doc1, doc2):
+def _calculate_document_similarity(view1, view2, threshold=0.85):
+    """
+    Weighted similarity in [0, 1]. Returns 0.0 early once even perfect
+    matches on the remaining features could not reach threshold.
+    """
     score = 0.0
     weights = []
     
-    recording1_raw = doc1.get('recording', {}).get('locationInstrumentNumber')
-    recording2_raw = doc2.get('recording', {}).get('locationInstrumentNumber')
-    
-    recording1 = _normalize_string(recording1_raw)
-    recording2 = _normalize_string(recording2_raw)
+    has_parties = bool(view1.from_set and view2.from_set and view1.to_set and view2.to_set)
+    has_legal = bool(view1.legal_prefix and view2.legal_prefix)
     
-    if recording1 and recording2:
-        if recording1 == recording2:
+    if view1.recording and view2.recording:
+        if view1.recording == view2.recording:
             score += 0.4
             weights.append(0.4)
         else:
             weights.append(0.4)
     
-    type1 = _normalize_string(doc1.get('documentType'))
-    type2 = _normalize_string(doc2.get('documentType'))
-    
-    if type1 and type2:
-        if type1 == type2:
+    if view1.doc_type and view2.doc_type:
+        if view1.doc_type == view2.doc_type:
             score += 0.2
-        elif _normalize_doc_type(type1) == _normalize_doc_type(type2):
+        elif view1.doc_type_canon == view2.doc_type_canon:
             score += 0.15
         weights.append(0.2)
     
-    date1_raw = doc1.get('dates', {}).get('recordDate')
-    date2_raw = doc2.get('dates', {}).get('recordDate')
-    
-    date1 = _normalize_string(date1_raw)
-    date2 = _normalize_string(date2_raw)
-    
-    if date1 and date2:
-        if date1 == date2:
+    if view1.date and view2.date:
+        if view1.date == view2.date:
             score += 0.15
         weights.append(0.15)
     
-    parties1_from_raw = doc1.get('parties', {}).get('from', []) or []
-    parties1_to_raw = doc1.get('parties', {}).get('to', []) or []
-    parties2_from_raw = doc2.get('parties', {}).get('from', []) or []
-    parties2_to_raw = doc2.get('parties', {}).get('to', []) or []
+    remaining = [w for w, present in ((0.15, has_parties), (0.1, has_legal)) if present]
+    if remaining and not _can_reach(score, weights, remaining, threshold):
+        return 0.0
     
-    parties1_from = set(_normalize_string(p) for p in parties1_from_raw)
-    parties1_to = set(_normalize_string(p) for p in parties1_to_raw)
-    parties2_from = set(_normalize_string(p) for p in parties2_from_raw)
-    parties2_to = set(_normalize_string(p) for p in parties2_to_raw)
-    
-    if parties1_from and parties2_from and parties1_to and parties2_to:
-        from_match = len(parties1_from & parties2_from) / max(len(parties1_from), len(parties2_from))
-        to_match = len(parties1_to & parties2_to) / max(len(parties1_to), len(parties2_to))
+    if has_parties:
+        # Party sets were normalized once in _precompute; has_parties rules out empty sets
+        from_match = len(view1.from_set & view2.from_set) / max(len(view1.from_set), len(view2.from_set))
+        to_match = len(view1.to_set & view2.to_set) / max(len(view1.to_set), len(view2.to_set))
         parties_score = (from_match + to_match) / 2
         score += 0.15 * parties_score
         weights.append(0.15)
     
-    legal1 = (doc1.get('property', {}).get('legalDescription') or '').strip()
-    legal2 = (doc2.get('property', {}).get('legalDescription') or '').strip()
-    
-    if legal1 and legal2:
-        ratio = SequenceMatcher(None, legal1[:500], legal2[:500]).ratio()
+    if has_legal:
+        # String similarity dominates the cost - skip it when it cannot matter
+        if not _can_reach(score, weights, [0.1], threshold):
+            return 0.0
+        
+        ratio = fuzz.ratio(view1.legal_prefix, view2.legal_prefix) / 100.0
         score += 0.1 * ratio
         weights.append(0.1)
     
@@ -188,6 +259,25 @@ def _calculate_document_similarity(doc1, doc2):
     return normalized_score
 
 
+def _can_reach(score, weights, remaining, threshold):
+    """
+    Whether the final score could still reach threshold if every remaining
+    feature matched perfectly. Accumulates in the same order as the real
+    computation so float rounding cannot make the bound too low.
+    """
+    for weight in remaining:
+        score += weight
+    return score / sum(weights + remaining) >= threshold
+
+
+# Discharge keywords as one case-insensitive alternation, so notes are scanned once
+_DISCHARGE_RE = re.compile(
+    r'discharged|satisfied|released|paid in full|cancelled|terminated',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1024)
 def _normalize_doc_type(doc_type):
     doc_type = doc_type.lower().strip()
     
@@ -210,23 +300,16 @@ def _has_discharge_info(notes):
     if not notes:
         return False
     
-    notes_lower = notes.lower()
-    discharge_keywords = [
-        'discharged',
-        'satisfied',
-        'released',
-        'paid in full',
-        'cancelled',
-        'terminated'
-    ]
-    
-    return any(keyword in notes_lower for keyword in discharge_keywords)
+    return _DISCHARGE_RE.search(notes) is not None
 
 
-def _merge_documents(existing_doc, duplicate_doc):
+def _merge_documents(existing_doc, duplicate_doc, page_bounds):
     """
     Merge duplicate document into existing one.
     Preserves page locations and important notes (especially discharge info).
+    page_bounds is the running [min_start, max_end] for existing_doc (empty
+    before its first merge); pageLocation itself is only rewritten by
+    _finalize_page_locations once all merges are done.
     """
     # Merge page locations
     existing_pages = existing_doc.get('pageLocation', {})
@@ -235,17 +318,14 @@ def _merge_documents(existing_doc, duplicate_doc):
     if 'allPageLocations' not in existing_doc:
         existing_doc['allPageLocations'] = [existing_pages.copy()]
     
+    if not page_bounds:
+        page_bounds.extend([None, None])
+        for pages in existing_doc['allPageLocations']:
+            _extend_page_bounds(page_bounds, pages)
+    
     if duplicate_pages:
         existing_doc['allPageLocations'].append(duplicate_pages)
-    
-    all_starts = [p.get('start', 999999) for p in existing_doc['allPageLocations'] if p.get('start')]
-    all_ends = [p.get('end', 0) for p in existing_doc['allPageLocations'] if p.get('end')]
-    
-    if all_starts and all_ends:
-        existing_doc['pageLocation']['start'] = min(all_starts)
-        existing_doc['pageLocation']['end'] = max(all_ends)
-        page_ranges = ', '.join([f"{p.get('start')}-{p.get('end')}" for p in existing_doc['allPageLocations']])
-        existing_doc['pageLocation']['note'] = f"Document appears on multiple pages: {page_ranges}"
+        _extend_page_bounds(page_bounds, duplicate_pages)
     
     # Merge notes - PRIORITIZE DISCHARGE INFORMATION
     existing_notes = existing_doc.get('notes', '') or ''
@@ -253,7 +333,7 @@ def _merge_documents(existing_doc, duplicate_doc):
     
     # If duplicate has discharge info but existing doesn't, use duplicate's notes
     if _has_discharge_info(duplicate_notes) and not _has_discharge_info(existing_notes):
-        print(f"    → Preserving discharge info from duplicate document")
+        log.debug("Preserving discharge info from duplicate document")
         existing_doc['notes'] = duplicate_notes
     # If existing has discharge info, keep it
     elif _has_discharge_info(existing_notes):
@@ -264,3 +344,23 @@ def _merge_documents(existing_doc, duplicate_doc):
             existing_doc['notes'] = f"{existing_notes} | {duplicate_notes}"
         else:
             existing_doc['notes'] = duplicate_notes
+
+
+def _extend_page_bounds(page_bounds, pages):
+    start, end = pages.get('start'), pages.get('end')
+    if start and (page_bounds[0] is None or start < page_bounds[0]):
+        page_bounds[0] = start
+    if end and (page_bounds[1] is None or end > page_bounds[1]):
+        page_bounds[1] = end
+
+
+def _finalize_page_locations(doc, page_bounds):
+    """Write the merged page span and the multiple-pages note onto pageLocation"""
+    min_start, max_end = page_bounds
+    if min_start is None or max_end is None:
+        return
+    
+    doc['pageLocation']['start'] = min_start
+    doc['pageLocation']['end'] = max_end
+    page_ranges = ', '.join([f"{p.get('start')}-{p.get('end')}" for p in doc['allPageLocations']])
+    doc['pageLocation']['note'] = f"Document appears on multiple pages: {page_ranges}"
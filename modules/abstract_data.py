@@ -0,0 +1,50 @@
+import streamlit as st
+import hashlib
+import json
+from src.renderer import render_markdown
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def abstract_version(abstract):
+    """Changes whenever the abstract is edited, so cached results keyed on it go stale"""
+    return str(abstract.last_edited_at or abstract.created_at)
+
+
+def load_abstract_data(abstract, edited=True):
+    """
+    Parsed abstract JSON (the edited version when there is one, unless edited=False)
+    Parsed once per distinct content and shared by reference with every view,
+    rerun and session - treat it as read-only and deepcopy before mutating
+    """
+    content_hash = _content_hash(abstract.id, abstract_version(abstract), edited, abstract)
+    return _parse_content(content_hash, abstract, edited)
+
+
+def _raw_json(abstract, edited):
+    # The JSON columns are deferred, so they are only read from the DB when needed
+    if edited and abstract.is_edited and abstract.edited_json_data:
+        return abstract.edited_json_data
+    return abstract.json_data
+
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def _content_hash(abstract_id, version, edited, _abstract):
+    # Small and cheap to copy; the raw JSON is only read and hashed once per version
+    return hashlib.blake2b(_raw_json(_abstract, edited).encode(), digest_size=16).hexdigest()
+
+
+@st.cache_resource(max_entries=50, show_spinner=False)
+def _parse_content(content_hash, _abstract, _edited):
+    # A resource, so hits hand back the same object instead of unpickling a copy
+    return _loads(_raw_json(_abstract, _edited))
+
+
+@st.cache_data(persist="disk", max_entries=100, show_spinner=False)
+def cached_render(data_json):
+    """Markdown for an abstract; data_json is json.dumps(..., sort_keys=True) so identical data shares an entry"""
+    return render_markdown(json.loads(data_json))
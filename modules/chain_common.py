@@ -0,0 +1,57 @@
+from datetime import datetime
+from functools import lru_cache
+
+
+def normalize_names(names):
+    """Normalize party names for comparison"""
+    if not names:
+        return []
+    
+    return [_normalize_name(name) for name in names if name]
+
+
+_NAME_PUNCTUATION = str.maketrans('', '', ',.')
+
+
+# Party names repeat across the documents of a chain, and across both chain views
+@lru_cache(maxsize=4096)
+def _normalize_name(name):
+    # Uppercase, drop commas and periods, collapse whitespace
+    return ' '.join(name.upper().translate(_NAME_PUNCTUATION).split())
+
+
+def parse_date(date_str, comma_optional=False):
+    """
+    Parse date string to datetime object
+    comma_optional also accepts month-name dates without the comma ("March 11 2001")
+    """
+    if not date_str:
+        return None
+    
+    try:
+        date_str = date_str.strip()
+        fmt = _date_format(date_str, comma_optional)
+        return datetime.strptime(date_str, fmt) if fmt else None
+    except (AttributeError, ValueError):
+        return None
+
+
+def _date_format(date_str, comma_optional):
+    """
+    The only supported format that could parse date_str, picked from its
+    separators so strptime runs once instead of failing through the list
+    """
+    if not date_str:
+        return None
+    if '/' in date_str:
+        return "%m/%d/%Y"
+    if '-' in date_str:
+        return "%Y-%m-%d"
+    
+    # A three-letter month can only be an abbreviation (May is both)
+    abbreviated = len(date_str.split(None, 1)[0]) == 3
+    if ',' in date_str:
+        return "%b %d, %Y" if abbreviated else "%B %d, %Y"
+    if comma_optional and date_str[:1].isalpha():
+        return "%b %d %Y" if abbreviated else "%B %d %Y"
+    return None
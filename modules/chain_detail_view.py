@@ -1,7 +1,9 @@
 import streamlit as st
-import json
-from datetime import datetime
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
 import re
+from modules.abstract_data import load_abstract_data, abstract_version
+from modules.chain_common import normalize_names, parse_date
 
 
 def render_chain_detail_view(abstract):
@@ -9,11 +11,8 @@ def render_chain_detail_view(abstract):
     Render detailed chain view with related documents (mortgages, satisfactions, etc.)
     nested under their corresponding deeds.
     """
-    # Load JSON data
-    if abstract.is_edited and abstract.edited_json_data:
-        data = json.loads(abstract.edited_json_data)
-    else:
-        data = json.loads(abstract.json_data)
+    # Parsed once per abstract version, not on every rerun
+    data = load_abstract_data(abstract)
     
     documents = data.get('documents', [])
     
@@ -24,54 +23,99 @@ def render_chain_detail_view(abstract):
     st.subheader("📋 Detailed Chain with Related Documents")
     st.caption("All documents including mortgages, satisfactions, and other encumbrances")
     
-    # Separate documents by type
+    # Separate documents by type and match related documents to deeds,
+    # reused across expander and checkbox reruns
+    table, deeds, mortgages, satisfactions, other_docs, deed_relationships = _chain_relationships(
+        abstract.id, abstract_version(abstract), documents
+    )
+    satisfaction_index = _build_satisfaction_index(table, satisfactions)
+    
+    # Display summary
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Deeds", len(deeds))
+    with col2:
+        active_mortgages = sum(1 for m in mortgages if not _is_satisfied(m, satisfaction_index))
+        st.metric("Active Mortgages", active_mortgages, delta="🔴" if active_mortgages > 0 else "✅")
+    with col3:
+        st.metric("Satisfactions", len(satisfactions))
+    with col4:
+        st.metric("Other Docs", len(other_docs))
+    
+    st.divider()
+    
+    # Display each deed with its related documents
+    for deed in deeds:
+        _render_deed_with_related(deed, deed_relationships.get(deed['_index'], {}), satisfaction_index)
+
+
+@st.cache_resource(max_entries=50, show_spinner=False)
+def _chain_relationships(abstract_id, version, _documents):
+    """
+    (table, deeds, mortgages, satisfactions, other_docs, relationships) for one
+    abstract version; shared by reference across reruns and sessions, so the
+    renderers only read it
+    """
+    table, deeds, mortgages, satisfactions, other_docs = _classify_and_enrich(_documents)
+    relationships = _build_relationships(table, deeds, mortgages, other_docs)
+    return table, deeds, mortgages, satisfactions, other_docs, relationships
+
+
+# Matching fields as parallel columns, one row per document in abstract order
+# (row = doc['_index'] - 1), so the joins index lists instead of nested dicts:
+# from_norm / to_norm - frozensets of normalized party names
+# date - parsed record date or None
+# rec_num - uppercased recording number for mortgages, '' otherwise
+_DocTable = namedtuple('_DocTable', ['from_norm', 'to_norm', 'date', 'rec_num'])
+
+
+def _classify_and_enrich(documents):
+    """
+    Split documents into (table, deeds, mortgages, satisfactions, other_docs)
+    in one pass, numbering each and filling its _DocTable row for matching
+    """
+    table = _DocTable([], [], [], [])
     deeds = []
     mortgages = []
     satisfactions = []
     other_docs = []
     
     for i, doc in enumerate(documents):
-        doc['_index'] = i + 1  # Add document number
+        # Number a shallow copy; the parsed abstract is shared and read-only
+        doc = {**doc, '_index': i + 1}
+        parties = doc.get('parties', {})
+        table.from_norm.append(frozenset(normalize_names(parties.get('from', []))))
+        table.to_norm.append(frozenset(normalize_names(parties.get('to', []))))
+        table.date.append(parse_date(doc.get('dates', {}).get('recordDate'), comma_optional=True))
         doc_type = doc.get('documentType', '').lower()
         
+        rec_num = ''
         if 'deed' in doc_type:
             deeds.append(doc)
         elif 'mortgage' in doc_type:
             mortgages.append(doc)
+            rec_num = doc.get('recording', {}).get('locationInstrumentNumber', '').strip().upper()
         elif 'satisfaction' in doc_type or 'discharge' in doc_type:
             satisfactions.append(doc)
         else:
             other_docs.append(doc)
+        table.rec_num.append(rec_num)
     
-    # Match related documents to deeds
-    deed_relationships = _build_relationships(deeds, mortgages, satisfactions, other_docs)
-    
-    # Display summary
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Total Deeds", len(deeds))
-    with col2:
-        active_mortgages = sum(1 for m in mortgages if not _is_satisfied(m, satisfactions))
-        st.metric("Active Mortgages", active_mortgages, delta="🔴" if active_mortgages > 0 else "✅")
-    with col3:
-        st.metric("Satisfactions", len(satisfactions))
-    with col4:
-        st.metric("Other Docs", len(other_docs))
-    
-    st.divider()
-    
-    # Display each deed with its related documents
-    for deed in deeds:
-        _render_deed_with_related(deed, deed_relationships.get(deed['_index'], {}), satisfactions)
+    return table, deeds, mortgages, satisfactions, other_docs
 
 
-def _build_relationships(deeds, mortgages, satisfactions, other_docs):
+def _build_relationships(table, deeds, mortgages, other_docs):
     """
     Build relationships between deeds and related documents.
     Returns dict: {deed_index: {mortgages: [], satisfactions: [], other: []}}
     """
     relationships = {}
     
+    # Index mortgages by mortgagor and other documents by any party once,
+    # so each deed only probes its own grantees instead of rescanning everything
+    mortgages_by_party = _index_by_party(mortgages, table.from_norm)
+    others_by_party = _index_by_party(other_docs, table.from_norm, table.to_norm)
+    
     for deed in deeds:
         deed_idx = deed['_index']
         relationships[deed_idx] = {
@@ -79,32 +123,44 @@ def _build_relationships(deeds, mortgages, satisfactions, other_docs):
             'other': []
         }
         
-        deed_grantees = set(_normalize_names(deed.get('parties', {}).get('to', [])))
-        deed_date = _parse_date(deed.get('dates', {}).get('recordDate'))
+        deed_grantees = table.to_norm[deed_idx - 1]
+        deed_date = table.date[deed_idx - 1]
         
-        # Find related mortgages
-        for mortgage in mortgages:
-            # Match by mortgagor = deed grantee
-            mortgagors = set(_normalize_names(mortgage.get('parties', {}).get('from', [])))
-            mtg_date = _parse_date(mortgage.get('dates', {}).get('recordDate'))
-            
-            # Check if mortgagor matches deed grantee and mortgage is after deed
-            if mortgagors & deed_grantees:
-                if not deed_date or not mtg_date or mtg_date >= deed_date:
-                    relationships[deed_idx]['mortgages'].append(mortgage)
+        # Find related mortgages - mortgagor matches deed grantee and mortgage is after deed
+        for i in _matching_positions(mortgages_by_party, deed_grantees):
+            mtg_date = table.date[mortgages[i]['_index'] - 1]
+            if not deed_date or not mtg_date or mtg_date >= deed_date:
+                relationships[deed_idx]['mortgages'].append(mortgages[i])
         
         # Find other related documents (judgments, liens, etc.)
-        for other in other_docs:
-            other_parties = set(_normalize_names(other.get('parties', {}).get('from', [])))
-            other_parties.update(_normalize_names(other.get('parties', {}).get('to', [])))
-            
-            if deed_grantees & other_parties:
-                relationships[deed_idx]['other'].append(other)
+        for i in _matching_positions(others_by_party, deed_grantees):
+            relationships[deed_idx]['other'].append(other_docs[i])
     
     return relationships
 
 
-def _render_deed_with_related(deed, related, all_satisfactions):
+def _index_by_party(docs, *columns):
+    """Map each normalized party name in the given _DocTable columns to the positions of docs naming it"""
+    index = defaultdict(list)
+    for i, doc in enumerate(docs):
+        row = doc['_index'] - 1
+        for name in frozenset().union(*(column[row] for column in columns)):
+            index[name].append(i)
+    return index
+
+
+def _matching_positions(index, names):
+    """Positions of docs naming any of names, in document order"""
+    return sorted(set(i for name in names for i in index.get(name, ())))
+
+
+# Deeds with more related mortgages than this list them behind a checkbox
+_INLINE_MORTGAGES = 3
+
+
+# A fragment, so toggling one deed's checkboxes reruns only that deed
+@st.fragment
+def _render_deed_with_related(deed, related, satisfaction_index):
     """Render a single deed with its related documents"""
     deed_idx = deed['_index']
     doc_type = deed.get('documentType', 'Deed')
@@ -149,8 +205,13 @@ def _render_deed_with_related(deed, related, all_satisfactions):
             st.divider()
             st.markdown("### 🔗 Related Mortgages")
             
-            for mortgage in related['mortgages']:
-                _render_mortgage(mortgage, all_satisfactions)
+            # Long lists are only built and sent to the browser when asked for
+            related_mortgages = related['mortgages']
+            if len(related_mortgages) <= _INLINE_MORTGAGES or st.checkbox(
+                f"Show all {len(related_mortgages)} related mortgages", key=f"mortgages_{deed_idx}"
+            ):
+                for mortgage in related_mortgages:
+                    _render_mortgage(mortgage, satisfaction_index)
         
         # Other related documents
         if related.get('other'):
@@ -161,7 +222,7 @@ def _render_deed_with_related(deed, related, all_satisfactions):
                 _render_other_document(doc)
 
 
-def _render_mortgage(mortgage, all_satisfactions):
+def _render_mortgage(mortgage, satisfaction_index):
     """Render a mortgage with its satisfaction status"""
     mtg_idx = mortgage['_index']
     mtg_parties = mortgage.get('parties', {})
@@ -170,7 +231,7 @@ def _render_mortgage(mortgage, all_satisfactions):
     mtg_amount = mortgage.get('monetary', {}).get('mortgageAmount', 'Unknown')
     
     # Check if satisfied (either separate document or in notes)
-    satisfaction_info = _get_satisfaction_info(mortgage, all_satisfactions)
+    satisfaction_info = _get_satisfaction_info(mortgage, satisfaction_index)
     
     if satisfaction_info:
         status_icon = "✅"
@@ -217,12 +278,12 @@ def _render_other_document(doc):
             st.write(f"**To:** {', '.join(doc_parties.get('to', []))}")
 
 
-def _is_satisfied(mortgage, all_satisfactions):
+def _is_satisfied(mortgage, satisfaction_index):
     """Check if a mortgage has a corresponding satisfaction"""
-    return _get_satisfaction_info(mortgage, all_satisfactions) is not None
+    return _get_satisfaction_info(mortgage, satisfaction_index) is not None
 
 
-def _get_satisfaction_info(mortgage, all_satisfactions):
+def _get_satisfaction_info(mortgage, satisfaction_index):
     """
     Get satisfaction information for a mortgage.
     Checks both:
@@ -254,7 +315,7 @@ def _get_satisfaction_info(mortgage, all_satisfactions):
                 return f"Discharged (see notes)"
     
     # If not in notes, check for separate satisfaction document
-    satisfaction = _find_satisfaction(mortgage, all_satisfactions)
+    satisfaction = _find_satisfaction(mortgage, satisfaction_index)
     if satisfaction:
         sat_date = satisfaction.get('dates', {}).get('recordDate', 'Unknown date')
         sat_recording = satisfaction.get('recording', {}).get('locationInstrumentNumber', '')
@@ -266,65 +327,55 @@ def _get_satisfaction_info(mortgage, all_satisfactions):
     return None
 
 
-def _find_satisfaction(mortgage, all_satisfactions):
-    """Find satisfaction document for a given mortgage"""
-    mtg_recording = mortgage.get('recording', {}).get('locationInstrumentNumber', '').strip().upper()
-    mtg_parties_to = set(_normalize_names(mortgage.get('parties', {}).get('to', [])))
-    mtg_date = _parse_date(mortgage.get('dates', {}).get('recordDate'))
-    
-    for satisfaction in all_satisfactions:
-        # Match by recording reference in satisfaction notes
-        sat_notes = satisfaction.get('notes', '') or ''
-        if mtg_recording and mtg_recording in sat_notes.upper():
-            return satisfaction
-        
-        # Match by parties (satisfaction from = mortgage to)
-        sat_from = set(_normalize_names(satisfaction.get('parties', {}).get('from', [])))
-        if mtg_parties_to & sat_from:
-            # Check date - satisfaction should be after mortgage
-            sat_date = _parse_date(satisfaction.get('dates', {}).get('recordDate'))
-            if sat_date and mtg_date and sat_date >= mtg_date:
-                return satisfaction
-    
-    return None
+# Satisfactions prepared once per render for _find_satisfaction:
+# notes_upper - every satisfaction's uppercased notes joined by '\0'
+# note_starts - offset of each satisfaction's notes within notes_upper
+# by_party - normalized 'from' party -> positions of satisfactions naming it
+# table - the _DocTable the rows of mortgages and satisfactions are read from
+_SatisfactionIndex = namedtuple('_SatisfactionIndex', ['satisfactions', 'notes_upper', 'note_starts', 'by_party', 'table'])
 
 
-def _normalize_names(names):
-    """Normalize party names for comparison"""
-    if not names:
-        return []
+def _build_satisfaction_index(table, all_satisfactions):
+    note_starts = []
+    offset = 0
+    notes = []
+    for satisfaction in all_satisfactions:
+        note = (satisfaction.get('notes', '') or '').upper()
+        note_starts.append(offset)
+        notes.append(note)
+        offset += len(note) + 1
     
-    normalized = []
-    for name in names:
-        if name:
-            # Remove common suffixes, normalize case and whitespace
-            clean = name.upper().strip()
-            clean = clean.replace(',', '').replace('.', '')
-            clean = ' '.join(clean.split())
-            normalized.append(clean)
+    by_party = _index_by_party(all_satisfactions, table.from_norm)
     
-    return normalized
+    return _SatisfactionIndex(all_satisfactions, '\0'.join(notes), note_starts, by_party, table)
 
 
-def _parse_date(date_str):
-    """Parse date string to datetime object"""
-    if not date_str:
-        return None
+def _find_satisfaction(mortgage, satisfaction_index):
+    """Find satisfaction document for a given mortgage"""
+    table = satisfaction_index.table
+    row = mortgage['_index'] - 1
+    mtg_recording = table.rec_num[row]
+    mtg_parties_to = table.to_norm[row]
+    mtg_date = table.date[row]
     
-    # Try common formats
-    formats = [
-        "%B %d, %Y",
-        "%b %d, %Y", 
-        "%m/%d/%Y",
-        "%Y-%m-%d",
-        "%B %d %Y",
-        "%b %d %Y"
-    ]
+    # Earliest satisfaction whose notes reference the recording number
+    match = len(satisfaction_index.satisfactions)
+    if mtg_recording and '\0' not in mtg_recording:
+        pos = satisfaction_index.notes_upper.find(mtg_recording)
+        if pos >= 0:
+            match = bisect_right(satisfaction_index.note_starts, pos) - 1
     
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str.strip(), fmt)
-        except:
-            continue
+    # Or an earlier one by parties (satisfaction from = mortgage to),
+    # recorded after the mortgage
+    candidates = set(i for name in mtg_parties_to for i in satisfaction_index.by_party.get(name, ()))
+    for i in sorted(candidates):
+        if i >= match:
+            break
+        sat_date = table.date[satisfaction_index.satisfactions[i]['_index'] - 1]
+        if sat_date and mtg_date and sat_date >= mtg_date:
+            match = i
+            break
     
+    if match < len(satisfaction_index.satisfactions):
+        return satisfaction_index.satisfactions[match]
     return None
@@ -1,7 +1,9 @@
 import streamlit as st
-import json
 import graphviz
-from datetime import datetime
+import re
+from collections import defaultdict, namedtuple
+from modules.abstract_data import load_abstract_data, abstract_version
+from modules.chain_common import normalize_names, parse_date
 
 
 def render_chain_visualization(abstract):
@@ -10,11 +12,8 @@ def render_chain_visualization(abstract):
     Shows ownership transfers and related documents (mortgages, liens)
     """
     
-    # Load JSON data
-    if abstract.is_edited and abstract.edited_json_data:
-        data = json.loads(abstract.edited_json_data)
-    else:
-        data = json.loads(abstract.json_data)
+    # Parsed once per abstract version, not on every rerun
+    data = load_abstract_data(abstract)
     
     documents = data.get('documents', [])
     
@@ -25,24 +24,31 @@ def render_chain_visualization(abstract):
     st.subheader("Chain of Title - Ownership Flow")
     st.caption("Deeds shown in main chain, mortgages/liens as side branches")
     
-    # Separate documents by type
-    deeds = []
-    mortgages = []
-    other_docs = []
+    # Graph is rebuilt only when the abstract changes, not on every rerun
+    st.graphviz_chart(_chain_dot_source(abstract.id, abstract_version(abstract), documents))
     
-    for i, doc in enumerate(documents):
-        doc['_index'] = i + 1
-        doc_type = doc.get('documentType', '').lower()
+    # Legend
+    with st.expander("📖 Chart Legend"):
+        st.markdown("""
+        **Main Chain (Solid Blue Lines):**
+        - 🔵 Blue boxes = Property transfers (Deeds)
+        - Solid arrows = Ownership flow
         
-        if 'deed' in doc_type and 'satisfaction' not in doc_type:
-            deeds.append(doc)
-        elif 'mortgage' in doc_type:
-            mortgages.append(doc)
-        else:
-            other_docs.append(doc)
+        **Related Documents (Dashed Lines):**
+        - 🔴 Red notes = Active mortgages/liens (not satisfied)
+        - 🟢 Green notes = Satisfied/discharged mortgages
+        - Dashed arrows = Related to deed but not ownership transfer
+        """)
+
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def _chain_dot_source(abstract_id, version, _documents):
+    """DOT source of the chain flowchart for one abstract version"""
+    # Separate documents by type
+    table, deeds, mortgages, other_docs = _classify_and_enrich(_documents)
     
     # Match mortgages to deeds
-    deed_relationships = _match_mortgages_to_deeds(deeds, mortgages)
+    deed_relationships = _match_mortgages_to_deeds(table, deeds, mortgages)
     
     # Create flowchart
     dot = graphviz.Digraph(comment='Chain of Title')
@@ -79,48 +85,80 @@ def render_chain_visualization(abstract):
         
         prev_deed_id = deed_id
     
-    # Render
-    st.graphviz_chart(dot)
+    return dot.source
+
+
+# Matching fields as parallel columns, one row per document in abstract order
+# (row = doc['_index'] - 1); only deed grantees and mortgage mortgagors are
+# normalized, other rows hold an empty set
+_DocTable = namedtuple('_DocTable', ['from_norm', 'to_norm', 'date'])
+
+_NO_NAMES = frozenset()
+
+
+def _classify_and_enrich(documents):
+    """
+    Split documents into (table, deeds, mortgages, other_docs) in one pass,
+    numbering each and filling the _DocTable columns mortgage matching reads
+    """
+    table = _DocTable([], [], [])
+    deeds = []
+    mortgages = []
+    other_docs = []
     
-    # Legend
-    with st.expander("📖 Chart Legend"):
-        st.markdown("""
-        **Main Chain (Solid Blue Lines):**
-        - 🔵 Blue boxes = Property transfers (Deeds)
-        - Solid arrows = Ownership flow
+    for i, doc in enumerate(documents):
+        # Number a shallow copy; the parsed abstract is shared and read-only
+        doc = {**doc, '_index': i + 1}
+        doc_type = doc.get('documentType', '').lower()
+        from_norm = to_norm = _NO_NAMES
+        date = None
         
-        **Related Documents (Dashed Lines):**
-        - 🔴 Red notes = Active mortgages/liens (not satisfied)
-        - 🟢 Green notes = Satisfied/discharged mortgages
-        - Dashed arrows = Related to deed but not ownership transfer
-        """)
+        if 'deed' in doc_type and 'satisfaction' not in doc_type:
+            to_norm = frozenset(normalize_names(doc.get('parties', {}).get('to', [])))
+            date = parse_date(doc.get('dates', {}).get('recordDate'))
+            deeds.append(doc)
+        elif 'mortgage' in doc_type:
+            from_norm = frozenset(normalize_names(doc.get('parties', {}).get('from', [])))
+            date = parse_date(doc.get('dates', {}).get('recordDate'))
+            mortgages.append(doc)
+        else:
+            other_docs.append(doc)
+        
+        table.from_norm.append(from_norm)
+        table.to_norm.append(to_norm)
+        table.date.append(date)
+    
+    return table, deeds, mortgages, other_docs
 
 
-def _match_mortgages_to_deeds(deeds, mortgages):
+def _match_mortgages_to_deeds(table, deeds, mortgages):
     """
     Match mortgages to their corresponding deeds.
     Returns dict: {deed_index: [mortgage, mortgage, ...]}
     """
     relationships = {}
     
+    # Index mortgages by mortgagor once, so each deed only probes its own grantees
+    mortgages_by_mortgagor = defaultdict(list)
+    for i, mortgage in enumerate(mortgages):
+        for name in table.from_norm[mortgage['_index'] - 1]:
+            mortgages_by_mortgagor[name].append(i)
+    
     for deed in deeds:
         deed_idx = deed['_index']
         relationships[deed_idx] = []
         
         # Get deed grantees (who received the property)
-        deed_grantees = set(_normalize_names(deed.get('parties', {}).get('to', [])))
-        deed_date = _parse_date(deed.get('dates', {}).get('recordDate'))
+        deed_grantees = table.to_norm[deed_idx - 1]
+        deed_date = table.date[deed_idx - 1]
         
-        # Find mortgages where mortgagor matches deed grantee
-        for mortgage in mortgages:
-            mortgagors = set(_normalize_names(mortgage.get('parties', {}).get('from', [])))
-            mtg_date = _parse_date(mortgage.get('dates', {}).get('recordDate'))
-            
-            # Check if mortgagor is same as deed grantee
-            if mortgagors & deed_grantees:
-                # Only attach if mortgage is after or close to deed date
-                if not deed_date or not mtg_date or mtg_date >= deed_date:
-                    relationships[deed_idx].append(mortgage)
+        # Find mortgages where mortgagor matches deed grantee, in document order
+        matches = sorted(set(i for name in deed_grantees for i in mortgages_by_mortgagor.get(name, ())))
+        for i in matches:
+            mtg_date = table.date[mortgages[i]['_index'] - 1]
+            # Only attach if mortgage is after or close to deed date
+            if not deed_date or not mtg_date or mtg_date >= deed_date:
+                relationships[deed_idx].append(mortgages[i])
     
     return relationships
 
@@ -162,54 +200,14 @@ def _create_mortgage_label(mortgage):
     return f"Mortgage\nTo: {mortgagee}\n{amount_str}\n{date}"
 
 
+_DISCHARGE_RE = re.compile(
+    r'discharged|satisfied|released|paid in full|cancelled',
+    re.IGNORECASE
+)
+
+
 def _check_if_satisfied(mortgage):
     """Check if mortgage has discharge/satisfaction info in notes"""
     notes = mortgage.get('notes', '') or ''
-    notes_lower = notes.lower()
-    
-    discharge_keywords = [
-        'discharged',
-        'satisfied',
-        'released',
-        'paid in full',
-        'cancelled'
-    ]
-    
-    return any(keyword in notes_lower for keyword in discharge_keywords)
-
-
-def _normalize_names(names):
-    """Normalize party names for comparison"""
-    if not names:
-        return []
-    
-    normalized = []
-    for name in names:
-        if name:
-            clean = name.upper().strip()
-            clean = clean.replace(',', '').replace('.', '')
-            clean = ' '.join(clean.split())
-            normalized.append(clean)
-    
-    return normalized
-
-
-def _parse_date(date_str):
-    """Parse date string to datetime object"""
-    if not date_str:
-        return None
-    
-    formats = [
-        "%B %d, %Y",
-        "%b %d, %Y",
-        "%m/%d/%Y",
-        "%Y-%m-%d"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str.strip(), fmt)
-        except:
-            continue
-    
-    return None
+    # One case-insensitive scan instead of lowering and testing each keyword
+    return _DISCHARGE_RE.search(notes) is not None
@@ -1,5 +1,28 @@
 import streamlit as st
-import json
+import re
+import threading
+import time
+from modules.abstract_data import load_abstract_data, abstract_version
+
+try:
+    import orjson
+    
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+    
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':'))
+
+# Document numbers mentioned in a question, e.g. "#3", "doc 3", "document no. 3"
+_DOC_REF_RE = re.compile(r'#\s*(\d+)|\bdoc(?:ument)?s?\s*(?:#|no\.?)?\s*(\d+)', re.IGNORECASE)
+
+# Finished answers are reused for an hour per (abstract version, question)
+_ANSWER_TTL = 3600
+_MAX_ANSWERS = 200
+# The answer store is shared by every session thread in the process
+_ANSWER_LOCK = threading.Lock()
 
 def render_chatbot(abstract, db, gemini_client):
     """
@@ -8,16 +31,26 @@ def render_chatbot(abstract, db, gemini_client):
     st.subheader("💬 Ask Questions About This Abstract")
     st.caption("Ask anything about the property, parties, dates, or chain of title")
     
-    # Load abstract data
-    if abstract.is_edited and abstract.edited_json_data:
-        data = json.loads(abstract.edited_json_data)
-    else:
-        data = json.loads(abstract.json_data)
+    # Parsed once per abstract version, not on every rerun
+    data = load_abstract_data(abstract)
     
     # Initialize chat history
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
     
+    # Fragment reruns replay these arguments after the run that loaded the
+    # abstract has closed its session, so only plain values are passed on
+    info = {
+        'id': abstract.id,
+        'version': abstract_version(abstract),
+        'filename': abstract.filename,
+        'pages': abstract.pages_processed
+    }
+    _chat(data, info, gemini_client)
+
+@st.fragment
+def _chat(data, info, gemini_client):
+    """Chat history and input; a new message or Clear reruns only this fragment, not the page"""
     # Display chat history
     for message in st.session_state.chat_history:
         with st.chat_message(message["role"]):
@@ -30,32 +63,55 @@ def render_chatbot(abstract, db, gemini_client):
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Generate response
+        # Generate response, rendered as it streams in
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = _get_ai_response(prompt, data, abstract, db, gemini_client)
-                st.markdown(response)
+            response = st.write_stream(_get_ai_response(prompt, data, info, gemini_client))
         
         st.session_state.chat_history.append({"role": "assistant", "content": response})
     
     # Clear chat button
-    if st.button("🗑️ Clear Chat"):
-        st.session_state.chat_history = []
-        st.rerun()
+    st.button("🗑️ Clear Chat", on_click=_clear_chat)
 
-def _get_ai_response(question, data, abstract, db, gemini_client):
+def _clear_chat():
+    st.session_state.chat_history = []
+
+def _get_ai_response(question, data, info, gemini_client):
     """
     Generate AI response based on abstract data
+    Yields the text as Gemini streams it, so the first words show without
+    waiting for the full answer
     """
+    # A repeated question on the same abstract version replays the stored answer
+    answers = _answer_store()
+    key = (info['id'], info['version'], ' '.join(question.lower().split()))
+    with _ANSWER_LOCK:
+        cached = answers.get(key)
+    if cached and time.monotonic() - cached[0] < _ANSWER_TTL:
+        yield cached[1]
+        return
+    
+    documents = data.get('documents', [])
+    
+    # Compact one-line-per-document summary, plus full details only for the
+    # documents the question refers to by number
+    referenced = sorted(set(
+        int(n) for groups in _DOC_REF_RE.findall(question) for n in groups if n
+    ))
+    details = '\n'.join(
+        f"#{n}: {_dumps(documents[n - 1])}" for n in referenced if 1 <= n <= len(documents)
+    )
+    if details:
+        details = f"\nFULL DETAILS OF REFERENCED DOCUMENTS:\n{details}\n"
+    
     # Build context from abstract data
     context = f"""You are a helpful assistant analyzing a title abstract.
 
-ABSTRACT DATA:
-{json.dumps(data, indent=2)}
-
-FILE: {abstract.filename}
-PAGES: {abstract.pages_processed}
-DOCUMENTS EXTRACTED: {len(data.get('documents', []))}
+ABSTRACT SUMMARY (#number type | from → to | record date | recording | amount | notes):
+{_abstract_summary(info['id'], info['version'], data)}
+{details}
+FILE: {info['filename']}
+PAGES: {info['pages']}
+DOCUMENTS EXTRACTED: {len(documents)}
 
 Answer the user's question based on this abstract data. Be specific and cite document numbers when relevant.
 If the information isn't in the abstract, say so clearly.
@@ -70,9 +126,54 @@ If the information isn't in the abstract, say so clearly.
         
         response = model.generate_content(
             prompt,
-            generation_config={'temperature': 0.7, 'max_output_tokens': 2000}
+            generation_config={'temperature': 0.7, 'max_output_tokens': 2000},
+            stream=True
         )
         
-        return response.text
+        chunks = []
+        for chunk in response:
+            chunks.append(chunk.text)
+            yield chunk.text
     except Exception as e:
-        return f"Sorry, I encountered an error: {str(e)}"
+        yield f"Sorry, I encountered an error: {str(e)}"
+        return
+    
+    # Only complete answers are stored, never errors or interrupted streams
+    with _ANSWER_LOCK:
+        answers.pop(key, None)
+        answers[key] = (time.monotonic(), ''.join(chunks))
+        while len(answers) > _MAX_ANSWERS:
+            answers.pop(next(iter(answers)), None)
+
+@st.cache_resource
+def _answer_store():
+    """Answers shared across sessions, guarded by _ANSWER_LOCK; insertion order is age order, oldest first"""
+    return {}
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def _abstract_summary(abstract_id, version, _data):
+    """One line per document plus any chain warnings, for the chat prompt"""
+    lines = []
+    for i, doc in enumerate(_data.get('documents', []), 1):
+        parties = doc.get('parties') or {}
+        from_parties = ', '.join(str(p) for p in parties.get('from') or [] if p) or '?'
+        to_parties = ', '.join(str(p) for p in parties.get('to') or [] if p) or '?'
+        fields = [
+            f"#{i} {doc.get('documentType') or 'Unknown'}",
+            f"{from_parties} → {to_parties}",
+            (doc.get('dates') or {}).get('recordDate') or 'no date',
+            (doc.get('recording') or {}).get('locationInstrumentNumber') or 'not recorded'
+        ]
+        amount = (doc.get('monetary') or {}).get('mortgageAmount')
+        if amount:
+            fields.append(f"amount {amount}")
+        if doc.get('notes'):
+            fields.append(f"notes: {doc['notes']}")
+        lines.append(' | '.join(str(f) for f in fields))
+    
+    warnings = (_data.get('review') or {}).get('chainWarnings') or []
+    if warnings:
+        lines.append('CHAIN WARNINGS:')
+        lines.extend(f"- {_dumps(w) if not isinstance(w, str) else w}" for w in warnings)
+    
+    return '\n'.join(lines)
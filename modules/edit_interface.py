@@ -1,6 +1,14 @@
 import streamlit as st
 import json
-from src.renderer import render_markdown
+import hashlib
+import re
+from modules.abstract_data import cached_render
+
+# Party lists are edited as "Name; Name"; splitting on this also trims each name
+_PARTY_SEP = re.compile(r'\s*;\s*')
+
+def _fingerprint(data_json):
+    return hashlib.blake2b(data_json.encode(), digest_size=16).hexdigest()
 
 def render_edit_interface(abstract, db):
     """Render the edit interface for an abstract"""
@@ -17,134 +25,35 @@ def render_edit_interface(abstract, db):
     
     st.info(f"Editing {len(documents)} documents")
     
-    # Edit each document
-    for i, doc in enumerate(documents):
-        with st.expander(f"Document {i+1}: {doc.get('documentType', 'Unknown')}", expanded=False):
-            
-            # Document order
-            col1, col2 = st.columns([1, 5])
-            with col1:
-                new_order = st.number_input(
-                    "Order #",
-                    min_value=1,
-                    max_value=len(documents),
-                    value=i + 1,
-                    step=1,
-                    key=f"order_{i}"
-                )
-            
-            with col2:
-                doc['documentType'] = st.text_input(
-                    "Document Type",
-                    value=doc.get('documentType', ''),
-                    key=f"doctype_{i}"
-                )
-            
-            # Parties
-            st.subheader("Parties")
-            parties = doc.get('parties', {})
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                parties['fromLabel'] = st.text_input(
-                    "From Label",
-                    value=parties.get('fromLabel', ''),
-                    key=f"fromlabel_{i}"
-                )
-                from_names = parties.get('from', [])
-                from_text = "; ".join(from_names) if isinstance(from_names, list) else str(from_names)
-                new_from = st.text_area(
-                    "From Parties",
-                    value=from_text,
-                    height=100,
-                    key=f"from_{i}"
-                )
-                parties['from'] = [n.strip() for n in new_from.split(';') if n.strip()]
-            
-            with col2:
-                parties['toLabel'] = st.text_input(
-                    "To Label",
-                    value=parties.get('toLabel', ''),
-                    key=f"tolabel_{i}"
-                )
-                to_names = parties.get('to', [])
-                to_text = "; ".join(to_names) if isinstance(to_names, list) else str(to_names)
-                new_to = st.text_area(
-                    "To Parties",
-                    value=to_text,
-                    height=100,
-                    key=f"to_{i}"
-                )
-                parties['to'] = [n.strip() for n in new_to.split(';') if n.strip()]
-            
-            doc['parties'] = parties
-            
-            # Dates
-            st.subheader("Dates")
-            dates = doc.get('dates', {})
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                dates['instrumentDate'] = st.text_input(
-                    "Instrument Date",
-                    value=dates.get('instrumentDate', ''),
-                    key=f"instdate_{i}"
-                )
-            with col2:
-                dates['acknowledgedDate'] = st.text_input(
-                    "Acknowledged Date",
-                    value=dates.get('acknowledgedDate', ''),
-                    key=f"ackdate_{i}"
-                )
-            with col3:
-                dates['recordDate'] = st.text_input(
-                    "Record Date",
-                    value=dates.get('recordDate', ''),
-                    key=f"recdate_{i}"
-                )
-            doc['dates'] = dates
-            
-            # Recording
-            st.subheader("Recording")
-            recording = doc.get('recording', {})
-            col1, col2 = st.columns(2)
-            with col1:
-                recording['locationInstrumentNumber'] = st.text_input(
-                    "Location/Instrument #",
-                    value=recording.get('locationInstrumentNumber', ''),
-                    key=f"loc_{i}"
-                )
-            with col2:
-                recording['county'] = st.text_input(
-                    "County",
-                    value=recording.get('county', ''),
-                    key=f"county_{i}"
-                )
-            doc['recording'] = recording
-            
-            # Page Location (read-only display)
-            if doc.get('pageLocation'):
-                pages_info = doc['pageLocation']
-                st.caption(f"📄 Found on pages {pages_info.get('start', '?')}-{pages_info.get('end', '?')}")
-            
-            # Notes field for all text content
-            st.subheader("Notes & Legal Description")
-            prop = doc.get('property', {})
-            current_notes = prop.get('legalDescription', '')
-            
-            edited_notes = st.text_area(
-                "All text content",
-                value=current_notes,
-                height=300,
-                key=f"notes_{i}"
-            )
-            prop['legalDescription'] = edited_notes
-            doc['property'] = prop
+    # One form, so edits only rerun the script when Save is pressed, not on
+    # every widget change
+    with st.form("edit_abstract", clear_on_submit=False):
+        # Edit each document
+        for i, doc in enumerate(documents):
+            _edit_document(i, doc, len(documents))
+        
+        # Save button
+        st.divider()
+        submitted = st.form_submit_button("💾 Save Changes", type="primary", use_container_width=True)
     
-    # Save button
-    st.divider()
-    if st.button("💾 Save Changes", type="primary", use_container_width=True):
-        # Regenerate markdown
-        new_markdown = render_markdown(st.session_state.working_json)
+    # Fingerprint the data as the editor first shows it (the widgets fill in
+    # missing fields), so a Save without edits can be recognized. A
+    # fingerprint taken for another abstract is never compared against
+    if (st.session_state.get('working_json_hash') is None
+            or st.session_state.get('working_json_hash_id') != st.session_state.current_abstract_id):
+        st.session_state.working_json_hash = _fingerprint(json.dumps(st.session_state.working_json, sort_keys=True))
+        st.session_state.working_json_hash_id = st.session_state.current_abstract_id
+    
+    if submitted:
+        data_json = json.dumps(st.session_state.working_json, sort_keys=True)
+        
+        # Nothing edited since the editor opened: skip the render and DB write
+        if _fingerprint(data_json) == st.session_state.working_json_hash:
+            st.info("No changes to save")
+            return
+        
+        # Regenerate markdown; data identical to a rendered abstract is a cache hit
+        new_markdown = cached_render(data_json)
         
         # Save to database
         success = db.update_abstract(
@@ -160,3 +69,130 @@ def render_edit_interface(abstract, db):
             st.rerun()
         else:
             st.error("❌ Failed to save changes")
+
+
+def _edit_document(i, doc, n_docs):
+    """
+    Widgets for one document of working_json, writing values back into doc
+    Runs inside the edit form, so its widgets only report on Save
+    """
+    with st.expander(f"Document {i+1}: {doc.get('documentType', 'Unknown')}", expanded=False):
+        
+        # Document order
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            new_order = st.number_input(
+                "Order #",
+                min_value=1,
+                max_value=n_docs,
+                value=i + 1,
+                step=1,
+                key=f"order_{i}"
+            )
+        
+        with col2:
+            doc['documentType'] = st.text_input(
+                "Document Type",
+                value=doc.get('documentType', ''),
+                key=f"doctype_{i}"
+            )
+        
+        # Parties
+        st.subheader("Parties")
+        parties = doc.get('parties', {})
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            parties['fromLabel'] = st.text_input(
+                "From Label",
+                value=parties.get('fromLabel', ''),
+                key=f"fromlabel_{i}"
+            )
+            from_names = parties.get('from', [])
+            from_text = "; ".join(from_names) if isinstance(from_names, list) else str(from_names)
+            new_from = st.text_area(
+                "From Parties",
+                value=from_text,
+                height=100,
+                key=f"from_{i}"
+            )
+            parties['from'] = [n for n in _PARTY_SEP.split(new_from.strip()) if n]
+        
+        with col2:
+            parties['toLabel'] = st.text_input(
+                "To Label",
+                value=parties.get('toLabel', ''),
+                key=f"tolabel_{i}"
+            )
+            to_names = parties.get('to', [])
+            to_text = "; ".join(to_names) if isinstance(to_names, list) else str(to_names)
+            new_to = st.text_area(
+                "To Parties",
+                value=to_text,
+                height=100,
+                key=f"to_{i}"
+            )
+            parties['to'] = [n for n in _PARTY_SEP.split(new_to.strip()) if n]
+        
+        doc['parties'] = parties
+        
+        # Dates
+        st.subheader("Dates")
+        dates = doc.get('dates', {})
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            dates['instrumentDate'] = st.text_input(
+                "Instrument Date",
+                value=dates.get('instrumentDate', ''),
+                key=f"instdate_{i}"
+            )
+        with col2:
+            dates['acknowledgedDate'] = st.text_input(
+                "Acknowledged Date",
+                value=dates.get('acknowledgedDate', ''),
+                key=f"ackdate_{i}"
+            )
+        with col3:
+            dates['recordDate'] = st.text_input(
+                "Record Date",
+                value=dates.get('recordDate', ''),
+                key=f"recdate_{i}"
+            )
+        doc['dates'] = dates
+        
+        # Recording
+        st.subheader("Recording")
+        recording = doc.get('recording', {})
+        col1, col2 = st.columns(2)
+        with col1:
+            recording['locationInstrumentNumber'] = st.text_input(
+                "Location/Instrument #",
+                value=recording.get('locationInstrumentNumber', ''),
+                key=f"loc_{i}"
+            )
+        with col2:
+            recording['county'] = st.text_input(
+                "County",
+                value=recording.get('county', ''),
+                key=f"county_{i}"
+            )
+        doc['recording'] = recording
+        
+        # Page Location (read-only display)
+        if doc.get('pageLocation'):
+            pages_info = doc['pageLocation']
+            st.caption(f"📄 Found on pages {pages_info.get('start', '?')}-{pages_info.get('end', '?')}")
+        
+        # Notes field for all text content
+        st.subheader("Notes & Legal Description")
+        prop = doc.get('property', {})
+        current_notes = prop.get('legalDescription', '')
+        
+        edited_notes = st.text_area(
+            "All text content",
+            value=current_notes,
+            height=300,
+            key=f"notes_{i}"
+        )
+        prop['legalDescription'] = edited_notes
+        doc['property'] = prop
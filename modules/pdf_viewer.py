@@ -1,4 +1,5 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import json
 import base64
 import os
@@ -15,65 +16,11 @@ def render_pdf_viewer(abstract, db):
         st.error("PDF file not found. It may have been deleted or not stored.")
         return
     
-    # Initialize zoom level in session state
-    if 'pdf_zoom' not in st.session_state:
-        st.session_state.pdf_zoom = 100
-    
     # Two columns: PDF on left, data on right
     col1, col2 = st.columns([1, 1])
     
     with col1:
-        st.caption("📄 Original PDF")
-        
-        # Zoom controls
-        zoom_col1, zoom_col2, zoom_col3, zoom_col4 = st.columns([1, 1, 1, 2])
-        with zoom_col1:
-            if st.button("🔍➖", help="Zoom Out"):
-                st.session_state.pdf_zoom = max(50, st.session_state.pdf_zoom - 25)
-                st.rerun()
-        with zoom_col2:
-            if st.button("🔍➕", help="Zoom In"):
-                st.session_state.pdf_zoom = min(200, st.session_state.pdf_zoom + 25)
-                st.rerun()
-        with zoom_col3:
-            if st.button("🔄", help="Reset Zoom"):
-                st.session_state.pdf_zoom = 100
-                st.rerun()
-        with zoom_col4:
-            st.caption(f"Zoom: {st.session_state.pdf_zoom}%")
-        
-        # Display PDF with zoom
-        with open(pdf_path, "rb") as f:
-            base64_pdf = base64.b64encode(f.read()).decode('utf-8')
-        
-        # Use iframe with scaling
-        zoom_scale = st.session_state.pdf_zoom / 100
-        
-        pdf_html = f"""
-        <style>
-            .pdf-container {{
-                width: 100%;
-                height: 800px;
-                overflow: auto;
-                border: 1px solid #ddd;
-                border-radius: 5px;
-            }}
-            .pdf-container iframe {{
-                transform: scale({zoom_scale});
-                transform-origin: 0 0;
-                width: {100/zoom_scale}%;
-                height: {800/zoom_scale}px;
-            }}
-        </style>
-        <div class="pdf-container">
-            <iframe src="data:application/pdf;base64,{base64_pdf}" 
-                    type="application/pdf"
-                    style="border: none;">
-            </iframe>
-        </div>
-        """
-        
-        st.markdown(pdf_html, unsafe_allow_html=True)
+        _render_pdf(pdf_path)
     
     with col2:
         st.caption("📋 Extracted Abstract")
@@ -87,3 +34,54 @@ def render_pdf_viewer(abstract, db):
                 st.markdown(abstract.markdown_output)
             else:
                 st.warning("No abstract data available")
+
+
+_MIN_ZOOM, _MAX_ZOOM, _ZOOM_STEP = 50, 200, 25
+
+@st.cache_data(max_entries=10, show_spinner=False)
+def _read_pdf_b64(pdf_path, mtime):
+    """Base64 of the PDF; keyed on mtime so a replaced file is re-read"""
+    with open(pdf_path, "rb") as f:
+        return base64.b64encode(f.read()).decode('utf-8')
+
+def _render_pdf(pdf_path):
+    """PDF pane with zoom controls that run in the browser, so zooming never reruns the script"""
+    st.caption("📄 Original PDF")
+    
+    # Read and encoded once per file version
+    base64_pdf = _read_pdf_b64(pdf_path, os.path.getmtime(pdf_path))
+    
+    # Scale the iframe in place and widen/heighten it to compensate, so the
+    # scaled page still fills the 800px viewport
+    pdf_html = f"""
+    <style>
+        .zoom-bar {{ display: flex; gap: 8px; align-items: center; margin-bottom: 8px; font-family: sans-serif; font-size: 14px; }}
+        .zoom-bar button {{ border: 1px solid #ddd; border-radius: 5px; background: #fff; padding: 4px 12px; cursor: pointer; }}
+        .pdf-container {{ width: 100%; height: 800px; overflow: auto; border: 1px solid #ddd; border-radius: 5px; }}
+        .pdf-container iframe {{ transform-origin: 0 0; border: none; }}
+    </style>
+    <div class="zoom-bar">
+        <button title="Zoom Out" onclick="setZoom(zoom - {_ZOOM_STEP})">🔍➖</button>
+        <button title="Zoom In" onclick="setZoom(zoom + {_ZOOM_STEP})">🔍➕</button>
+        <button title="Reset Zoom" onclick="setZoom(100)">🔄</button>
+        <span id="zoom-label"></span>
+    </div>
+    <div class="pdf-container">
+        <iframe id="pdf-frame" src="data:application/pdf;base64,{base64_pdf}" type="application/pdf"></iframe>
+    </div>
+    <script>
+        let zoom = 100;
+        function setZoom(value) {{
+            zoom = Math.max({_MIN_ZOOM}, Math.min({_MAX_ZOOM}, value));
+            const scale = zoom / 100;
+            const frame = document.getElementById('pdf-frame');
+            frame.style.transform = `scale(${{scale}})`;
+            frame.style.width = `${{100 / scale}}%`;
+            frame.style.height = `${{800 / scale}}px`;
+            document.getElementById('zoom-label').textContent = `Zoom: ${{zoom}}%`;
+        }}
+        setZoom(100);
+    </script>
+    """
+    
+    components.html(pdf_html, height=860)
@@ -1,17 +1,42 @@
 import streamlit as st
-import json
 from datetime import datetime
+from functools import lru_cache
 import plotly.graph_objects as go
 import plotly.express as px
+from modules.abstract_data import load_abstract_data, abstract_version
 
-def render_timeline(abstract):
-    """Render interactive timeline visualization"""
-    
-    # Load JSON data
-    if abstract.is_edited and abstract.edited_json_data:
-        data = json.loads(abstract.edited_json_data)
+# Record dates recur across documents and reruns
+@lru_cache(maxsize=4096)
+def _parse_record_date(record_date_str):
+    """
+    Parse "March 11, 2001", "03/11/2001" or "2001-03-11"
+    The separators leave only one format that could match, so strptime runs once
+    instead of raising for each format that doesn't
+    """
+    if not isinstance(record_date_str, str):
+        return None
+    if '/' in record_date_str:
+        fmt = "%m/%d/%Y"
+    elif '-' in record_date_str:
+        fmt = "%Y-%m-%d"
+    elif ',' in record_date_str:
+        fmt = "%B %d, %Y"
     else:
-        data = json.loads(abstract.json_data)
+        return None
+    
+    try:
+        return datetime.strptime(record_date_str, fmt)
+    except ValueError:
+        return None
+
+def render_timeline(abstract, on_edit=None):
+    """
+    Render interactive timeline visualization
+    on_edit(abstract_id) opens the editor, loading a fresh working copy
+    """
+    
+    # Parsed once per abstract version, not on every rerun
+    data = load_abstract_data(abstract)
     
     documents = data.get('documents', [])
     
@@ -21,22 +46,48 @@ def render_timeline(abstract):
     
     st.subheader("Chain of Title Timeline")
     
+    # Dates, rows and figure are rebuilt only when the abstract changes, not
+    # on every expander or button rerun
+    timeline_data, fig = _timeline(abstract.id, abstract_version(abstract), documents)
+    
+    if not timeline_data:
+        st.warning("No documents with valid dates found")
+        return
+    
+    st.plotly_chart(fig, use_container_width=True, config={'displaylogo': False, 'responsive': True})
+    
+    # Document list with page references
+    st.subheader("Document List")
+    
+    for item in timeline_data:
+        with st.expander(f"#{item['id']} - {item['type']} ({item['date_str']}) - {item['pages']}"):
+            st.write(f"**From:** {item['from']}")
+            st.write(f"**To:** {item['to']}")
+            st.write(f"**Record Date:** {item['date_str']}")
+            st.write(f"**Pages:** {item['pages']}")
+            
+            # Link to edit; on_edit runs before the rerun the click triggers
+            if on_edit:
+                st.button(f"Edit Document #{item['id']}", key=f"edit_btn_{item['id']}",
+                          on_click=on_edit, args=(abstract.id,))
+            elif st.button(f"Edit Document #{item['id']}", key=f"edit_btn_{item['id']}"):
+                st.session_state.view_mode = 'edit'
+                st.rerun()
+
+# A resource rather than data: st.plotly_chart takes a Figure as-is, while a
+# dict (or an unpickled copy) is rebuilt and re-validated on every rerun
+@st.cache_resource(max_entries=50, show_spinner=False)
+def _timeline(abstract_id, version, _documents):
+    """(timeline rows sorted by date, figure) for one abstract version; read-only"""
     # Parse dates and prepare data
     timeline_data = []
     
-    for i, doc in enumerate(documents, 1):
+    for i, doc in enumerate(_documents, 1):
         doc_type = doc.get('documentType', 'Unknown')
         dates = doc.get('dates', {})
         record_date_str = dates.get('recordDate', '')
         
-        # Try to parse date
-        parsed_date = None
-        for fmt in ["%B %d, %Y", "%m/%d/%Y", "%Y-%m-%d"]:
-            try:
-                parsed_date = datetime.strptime(record_date_str, fmt)
-                break
-            except:
-                continue
+        parsed_date = _parse_record_date(record_date_str)
         
         if parsed_date:
             parties = doc.get('parties', {})
@@ -58,8 +109,7 @@ def render_timeline(abstract):
             })
     
     if not timeline_data:
-        st.warning("No documents with valid dates found")
-        return
+        return timeline_data, None
     
     # Sort by date
     timeline_data.sort(key=lambda x: x['date'])
@@ -77,26 +127,30 @@ def render_timeline(abstract):
     # Create timeline visualization
     fig = go.Figure()
     
+    # One trace per document type rather than per document; hover text is
+    # filled in from customdata, so the figure JSON stays small
+    by_type = {}
     for item in timeline_data:
-        doc_type = item['type']
-        color = color_map.get(doc_type, '#95a5a6')
-        
+        by_type.setdefault(item['type'], []).append(item)
+    
+    for doc_type, items in by_type.items():
         fig.add_trace(go.Scatter(
-            x=[item['date']],
-            y=[item['id']],
+            x=[item['date'] for item in items],
+            y=[item['id'] for item in items],
             mode='markers+text',
-            marker=dict(size=15, color=color, line=dict(width=2, color='white')),
-            text=[f"{item['id']}"],
+            marker=dict(size=15, color=color_map.get(doc_type, '#95a5a6'), line=dict(width=2, color='white')),
+            text=[f"{item['id']}" for item in items],
             textposition="middle center",
             textfont=dict(color='white', size=10),
             name=doc_type,
+            customdata=[[item['date_str'], item['from'], item['to'], item['pages']] for item in items],
             hovertemplate=(
-                f"<b>Document #{item['id']}</b><br>" +
+                "<b>Document #%{y}</b><br>" +
                 f"Type: {doc_type}<br>" +
-                f"Date: {item['date_str']}<br>" +
-                f"From: {item['from']}<br>" +
-                f"To: {item['to']}<br>" +
-                f"Pages: {item['pages']}<br>" +
+                "Date: %{customdata[0]}<br>" +
+                "From: %{customdata[1]}<br>" +
+                "To: %{customdata[2]}<br>" +
+                "Pages: %{customdata[3]}<br>" +
                 "<extra></extra>"
             ),
             showlegend=True
@@ -115,19 +169,4 @@ def render_timeline(abstract):
         )
     )
     
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Document list with page references
-    st.subheader("Document List")
-    
-    for item in timeline_data:
-        with st.expander(f"#{item['id']} - {item['type']} ({item['date_str']}) - {item['pages']}"):
-            st.write(f"**From:** {item['from']}")
-            st.write(f"**To:** {item['to']}")
-            st.write(f"**Record Date:** {item['date_str']}")
-            st.write(f"**Pages:** {item['pages']}")
-            
-            # Link to edit
-            if st.button(f"Edit Document #{item['id']}", key=f"edit_btn_{item['id']}"):
-                st.session_state.view_mode = 'edit'
-                st.rerun()
+    return timeline_data, fig
@@ -262,12 +262,13 @@ elif st.session_state.current_abstract_id is None:
             
             with st.status("Processing document...", expanded=True) as status:
                 try:
-                    # Convert PDF
-                    st.write(log_message("📄 Converting PDF to images..."))
+                    # Count pages from the PDF metadata; Gemini reads the file
+                    # itself, so the pages are never rasterized here
+                    st.write(log_message("📄 Reading PDF..."))
                     from src.pdf_processor import PDFProcessor
                     processor = PDFProcessor()
-                    images = processor.pdf_to_images(temp_path)
-                    st.write(log_message(f"✓ Converted {len(images)} pages"))
+                    page_count = processor.get_page_count(temp_path)
+                    st.write(log_message(f"✓ Found {page_count} pages"))
                     
                     # Upload
                     st.write(log_message("☁️ Uploading to Gemini Files API..."))
@@ -278,7 +279,7 @@ elif st.session_state.current_abstract_id is None:
                     
                     # Pass 1: Inventory
                     st.write(log_message("🔍 **PASS 1:** Creating document inventory..."))
-                    inventory = abstractor._get_inventory(file_info, len(images))
+                    inventory = abstractor._get_inventory(file_info, page_count)
                     st.write(log_message(f"✓ Found {len(inventory)} documents:"))
                     
                     for i, doc_info in enumerate(inventory, 1):
@@ -364,7 +365,7 @@ elif st.session_state.current_abstract_id is None:
                     result = {
                         "source": {"fileName": uploaded_file.name, "county": "", "state": "NY"},
                         "review": {
-                            "totalPagesProcessed": len(images),
+                            "totalPagesProcessed": page_count,
                             "allPagesReviewed": True,
                             "chainWarnings": warnings,
                             "extractionMethod": "two-pass-hybrid",
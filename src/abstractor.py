@@ -1,6 +1,9 @@
 import json
+import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List
 from config.prompts import get_combined_prompt
 from src.gemini_client import GeminiClient
@@ -8,7 +11,82 @@ from src.pdf_processor import PDFProcessor
 from src.file_uploader import FileUploader
 from src.chain_analyzer import ChainAnalyzer
 
+try:
+    import orjson
+    
+    def _encode_json(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _encode_json(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+# Serializes background writes, since concurrent runs share the same output file
+_write_lock = threading.Lock()
+
+def _write_json_in_background(path: str, obj) -> None:
+    """
+    Encode obj now, so the caller can keep using it, and write the file on a
+    separate thread; non-daemon, so a pending write still finishes at exit
+    """
+    data = _encode_json(obj)
+    
+    def write():
+        with _write_lock, open(path, 'wb') as f:
+            f.write(data)
+    
+    threading.Thread(target=write, name=f"write-{path}").start()
+
+# Raw Gemini responses are written to disk for debugging only when
+# ABSTRACTOR_DEBUG_DUMP=1
+DEBUG_DUMP = os.environ.get('ABSTRACTOR_DEBUG_DUMP') == '1'
+
+def _dump_response(path: str, response_text: str) -> None:
+    if DEBUG_DUMP:
+        with open(path, 'w') as f:
+            f.write(response_text)
+
+# Response cleanup patterns for _extract_json
+_FENCE_START = re.compile(r'^```(?:json)?\s*', re.IGNORECASE)
+_FENCE_END = re.compile(r'\s*```\s*$')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_ADJACENT_OBJECTS = re.compile(r'}\s*{')
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+def _close_truncated_json(json_str: str, end: int):
+    """
+    json_str[:end] cut after its last closing brace/bracket, with the
+    brackets still open at that point closed; None if nothing closed
+    Tracks strings and escapes, so braces inside values don't count
+    """
+    stack = []
+    in_string = escape = False
+    last_cut, last_closers = None, ''
+    
+    for i, ch in enumerate(json_str[:end]):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in '}]' and stack:
+            stack.pop()
+            last_cut, last_closers = i + 1, ''.join(reversed(stack))
+    
+    if last_cut is None:
+        return None
+    return json_str[:last_cut] + last_closers
+
 class TitleAbstractor:
+    # Pass 2 extractions are independent Gemini calls against the same uploaded file
+    PASS2_MAX_WORKERS = 8
+    
     def __init__(self, api_key: str):
         self.gemini = GeminiClient(api_key)
         self.uploader = FileUploader(api_key)
@@ -32,14 +110,21 @@ class TitleAbstractor:
             "ucc continuation": "ucc"
         }
         
+        # Pass 2 instructions per prompt key, built once rather than per document
+        self.detail_instructions = {
+            key: get_combined_prompt([key]) for key in set(self.doc_type_mapping.values())
+        }
+        # Combined pass instructions for every document type, also built once
+        self.combined_instructions = get_combined_prompt(list(dict.fromkeys(self.doc_type_mapping.values())))
+        
     def process_pdf(self, pdf_path: str, filename: str) -> Dict:
         start_time = time.time()
         
         print(f"Processing: {filename}")
         
         # Get page count
-        images = self.pdf_processor.pdf_to_images(pdf_path)
-        page_count = len(images)
+        # Read from the PDF metadata; no need to rasterize pages just to count them
+        page_count = self.pdf_processor.get_page_count(pdf_path)
         print(f"Document has {page_count} pages")
         
         # Upload file once
@@ -60,25 +145,34 @@ class TitleAbstractor:
             
             # PASS 2: Extract details for each document
             print(f"\n=== PASS 2: Detailed Extraction ===")
-            all_documents = []
+            extracted = {}
             
-            for i, doc_info in enumerate(inventory, 1):
-                doc_type = doc_info.get('type', 'Unknown')
-                pages = doc_info.get('pages', {})
-                print(f"  Document {i}/{len(inventory)}: {doc_type} (pages {pages.get('start', '?')}-{pages.get('end', '?')})...", end=" ")
+            # Network-bound calls, so run them concurrently; one failure does
+            # not abort the rest
+            with ThreadPoolExecutor(max_workers=max(1, min(self.PASS2_MAX_WORKERS, len(inventory)))) as executor:
+                futures = {
+                    executor.submit(self._extract_document_detail, file_info, doc_info, i): (i, doc_info)
+                    for i, doc_info in enumerate(inventory, 1)
+                }
                 
-                try:
-                    doc_detail = self._extract_document_detail(file_info, doc_info, i)
-                    
-                    # Add page location to document for future highlighting
-                    doc_detail['pageLocation'] = pages
+                for future in as_completed(futures):
+                    i, doc_info = futures[future]
+                    doc_type = doc_info.get('type', 'Unknown')
+                    pages = doc_info.get('pages', {})
                     
-                    all_documents.append(doc_detail)
-                    print("✓")
-                except Exception as e:
-                    print(f"✗ Error: {e}")
-                    # Continue processing other documents
-                    continue
+                    try:
+                        doc_detail = future.result()
+                        
+                        # Add page location to document for future highlighting
+                        doc_detail['pageLocation'] = pages
+                        
+                        extracted[i] = doc_detail
+                        print(f"  Document {i}/{len(inventory)}: {doc_type} (pages {pages.get('start', '?')}-{pages.get('end', '?')})... ✓")
+                    except Exception as e:
+                        print(f"  Document {i}/{len(inventory)}: {doc_type} (pages {pages.get('start', '?')}-{pages.get('end', '?')})... ✗ Error: {e}")
+            
+            # Restore inventory order regardless of completion order
+            all_documents = [extracted[i] for i in sorted(extracted)]
             
             # Clean up
             self.uploader.delete_file(file_info['name'])
@@ -97,13 +191,15 @@ class TitleAbstractor:
             # Calculate processing time and savings
             processing_time_seconds = time.time() - start_time
             
-            # Count document types
+            # Count document types and total characters in legal descriptions,
+            # in one pass
             num_documents = len(sorted_docs)
-            num_deeds = sum(1 for d in sorted_docs if 'deed' in d.get('documentType', '').lower())
-            num_mortgages = sum(1 for d in sorted_docs if 'mortgage' in d.get('documentType', '').lower())
-            
-            # Count total characters in legal descriptions
-            total_chars = sum(len(d.get('property', {}).get('legalDescription', '')) for d in sorted_docs)
+            num_deeds = num_mortgages = total_chars = 0
+            for d in sorted_docs:
+                doc_type = d.get('documentType', '').lower()
+                num_deeds += 'deed' in doc_type
+                num_mortgages += 'mortgage' in doc_type
+                total_chars += len(d.get('property', {}).get('legalDescription', ''))
             
             # Manual time estimate
             # 4 min per document + 1 min extra for deeds/mortgages + typing time (50 WPM = 250 chars/min)
@@ -152,8 +248,7 @@ class TitleAbstractor:
             }
             
             # Save
-            with open('final_result.json', 'w') as f:
-                json.dump(final_result, f, indent=2)
+            _write_json_in_background('final_result.json', final_result)
             
             print(f"\n✓ Final result saved")
             print(f"✓ Total documents: {len(sorted_docs)}")
@@ -202,8 +297,7 @@ Do not include explanatory text. Output ONLY valid JSON."""
         try:
             response_text = self.gemini.process_file(file_info['uri'], prompt, timeout=300)
             
-            with open('inventory_response.txt', 'w') as f:
-                f.write(response_text)
+            _dump_response('inventory_response.txt', response_text)
             
             result = self._extract_json(response_text)
             
@@ -212,6 +306,66 @@ Do not include explanatory text. Output ONLY valid JSON."""
         except Exception as e:
             raise Exception(f"Inventory extraction failed: {e}")
     
+    def extract_all_in_one(self, file_info: Dict, page_count: int) -> List[Dict]:
+        """
+        Combined Pass 1 + Pass 2: inventory and full details in a single call
+        Returns inventory entries; each carries a 'detail' document when the
+        response contained a usable one, otherwise 'detail' is None and the
+        caller should fall back to _extract_document_detail
+        """
+        base_instructions = self.combined_instructions
+        
+        prompt = f"""{base_instructions}
+
+Scan this {page_count}-page title document and extract ALL documents in ONE response.
+
+For EACH document, output its type, the page numbers where it starts and ends,
+and a "detail" object with complete details matching the schema above:
+- Full legal description (verbatim)
+- All clauses (verbatim): "being same premises", "subject to", "together with", "excepting and reserving"
+- Complete party information with all names
+- All dates (instrument, acknowledged, recorded)
+- Recording information (location/instrument number, county)
+- Monetary amounts (consideration, mortgage amount, transfer taxes)
+- Property details (tax parcel, municipality)
+
+Be thorough - list EVERY document in the file.
+
+Output ONLY this JSON structure:
+{{
+  "documents": [
+    {{
+      "type": "Deed",
+      "pages": {{"start": 5, "end": 7}},
+      "detail": {{ "documentType": "Deed", ... }}
+    }}
+  ]
+}}
+
+IMPORTANT: Output valid JSON only. Ensure all strings are properly escaped and all braces/brackets are balanced."""
+
+        try:
+            response_text = self.gemini.process_file(file_info['uri'], prompt, timeout=300, json_mode=True)
+            result = self._extract_json(response_text)
+        except Exception as e:
+            raise Exception(f"Combined extraction failed: {e}")
+        
+        inventory = []
+        for i, entry in enumerate(result.get('documents', []), 1):
+            detail = entry.get('detail')
+            # Only accept details that look like a document object
+            if not isinstance(detail, dict) or not detail.get('documentType'):
+                detail = None
+            
+            inventory.append({
+                'id': i,
+                'type': entry.get('type') or (detail or {}).get('documentType', 'Unknown'),
+                'pages': entry.get('pages', {}) or {},
+                'detail': detail
+            })
+        
+        return inventory
+    
     def _extract_document_detail(self, file_info: Dict, doc_info: Dict, doc_num: int) -> Dict:
         """
         Pass 2: Extract full details for a specific document
@@ -223,7 +377,7 @@ Do not include explanatory text. Output ONLY valid JSON."""
         
         # Get document-type-specific prompt
         prompt_key = self.doc_type_mapping.get(doc_type.lower(), "deed")
-        base_instructions = get_combined_prompt([prompt_key])
+        base_instructions = self.detail_instructions[prompt_key]
         
         prompt = f"""{base_instructions}
 
@@ -250,8 +404,7 @@ Output a single document object matching the schema. Do not wrap in array.
             try:
                 response_text = self.gemini.process_file(file_info['uri'], prompt, timeout=300)
                 
-                with open(f'document_{doc_num}_response.txt', 'w') as f:
-                    f.write(response_text)
+                _dump_response(f'document_{doc_num}_response.txt', response_text)
                 
                 result = self._extract_json(response_text)
                 
@@ -300,10 +453,17 @@ Output a single document object matching the schema. Do not wrap in array.
         """Extract JSON from response text with robust error recovery"""
         text = text.strip()
         
+        # Common case: the response is exactly one JSON object
+        if text[:1] == '{' and text[-1:] == '}':
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                pass
+        
         # Remove markdown code blocks
         if text.startswith('```'):
-            text = re.sub(r'^```(?:json)?\s*', '', text, flags=re.IGNORECASE)
-            text = re.sub(r'\s*```\s*$', '', text)
+            text = _FENCE_START.sub('', text)
+            text = _FENCE_END.sub('', text)
         
         # Find JSON object
         start = text.find('{')
@@ -320,34 +480,27 @@ Output a single document object matching the schema. Do not wrap in array.
         except json.JSONDecodeError as e:
             # Attempt 1: Fix common issues
             fixed = json_str
-            fixed = re.sub(r',\s*}', '}', fixed)  # Remove trailing commas before }
-            fixed = re.sub(r',\s*]', ']', fixed)  # Remove trailing commas before ]
-            fixed = re.sub(r'}\s*{', '},{', fixed)  # Add comma between objects
+            fixed = _TRAILING_COMMA.sub(r'\1', fixed)  # Remove trailing commas before } and ]
+            fixed = _ADJACENT_OBJECTS.sub('},{', fixed)  # Add comma between objects
             
             try:
                 return json.loads(fixed)
             except:
                 pass
             
-            # Attempt 2: Find the last valid closing brace before the error
+            # Attempt 2: Cut back to the last complete object/array before the
+            # error and close whatever is still open, in one pass
             error_pos = e.pos if hasattr(e, 'pos') else len(json_str)
             
-            # Try progressively smaller chunks
-            for attempt_end in range(error_pos, start, -100):
-                # Find the last complete closing brace
-                test_str = json_str[:attempt_end]
-                brace_count = test_str.count('{') - test_str.count('}')
-                
-                if brace_count > 0:
-                    test_str += '}' * brace_count
-                
+            test_str = _close_truncated_json(json_str, error_pos)
+            if test_str is not None:
                 try:
                     result = json.loads(test_str)
                     # Log that we recovered partial data
-                    print(f"⚠️ Recovered partial JSON (truncated at ~{attempt_end} chars)")
+                    print(f"⚠️ Recovered partial JSON (truncated at ~{len(test_str)} chars)")
                     return result
-                except:
-                    continue
+                except json.JSONDecodeError:
+                    pass
             
             # Attempt 3: Save the problematic JSON for debugging
             with open('json_parse_error.txt', 'w') as f:
@@ -1,6 +1,31 @@
 from datetime import datetime
 from typing import List, Dict, Optional
+from functools import lru_cache
+from operator import itemgetter
 import re
+from src.date_parsing import parse_date
+
+_WS_RE = re.compile(r'\s+')
+_LOT_RE = re.compile(r'lot\s*(?:no\.?\s*)?(\d+)', re.IGNORECASE)
+_BLOCK_RE = re.compile(r'block\s*(?:no\.?\s*)?(\d+)', re.IGNORECASE)
+_PARCEL_RE = re.compile(r'(?:parcel|tax\s*map)\s*(?:no\.?\s*)?([0-9\.\-]+)', re.IGNORECASE)
+
+# Replaced in this order, each on the result of the one before
+_ABBREVIATIONS = (
+    ('ft.', 'feet'),
+    ('ft', 'feet'),
+    ('n.', 'north'),
+    ('s.', 'south'),
+    ('e.', 'east'),
+    ('w.', 'west'),
+    ('st.', 'street'),
+    ('ave.', 'avenue'),
+    ('rd.', 'road'),
+    ('blvd.', 'boulevard'),
+)
+
+# Five years, in days
+_GAP_WARNING_DAYS = 5 * 365.25
 
 class ChainAnalyzer:
     """
@@ -32,7 +57,8 @@ class ChainAnalyzer:
             return documents, ["No documents to analyze"]
         
         # Step 1: Parse and validate dates
-        docs_with_dates = []
+        # Parsed dates are kept alongside the documents rather than stored on them
+        dated = []
         docs_without_dates = []
         
         for i, doc in enumerate(documents):
@@ -41,50 +67,62 @@ class ChainAnalyzer:
             # Handle None, null string, or empty string
             if not record_date or record_date == 'None' or record_date.strip() == '':
                 warnings.append(f"Document {i+1} ({doc.get('documentType', 'Unknown')}): Missing record date")
-                doc['_parsed_record_date'] = None
                 docs_without_dates.append(doc)
             else:
                 parsed = self._parse_date(record_date)
                 
                 if not parsed:
                     warnings.append(f"Document {i+1}: Could not parse record date '{record_date}'")
-                    doc['_parsed_record_date'] = None
                     docs_without_dates.append(doc)
                 else:
-                    doc['_parsed_record_date'] = parsed
-                    docs_with_dates.append(doc)
+                    dated.append((parsed, doc))
         
         # Step 2: Sort documents with valid dates
-        sorted_docs_with_dates = sorted(docs_with_dates, key=lambda d: d.get('_parsed_record_date', datetime.min))
+        dated.sort(key=itemgetter(0))
+        sorted_dates = [date for date, _ in dated]
+        sorted_docs_with_dates = [doc for _, doc in dated]
         
         # Step 3: Add documents without dates at the end (preserving their original order)
         sorted_docs = sorted_docs_with_dates + docs_without_dates
         
-        # Step 4: Validate chronological order (only for docs with dates)
-        for i in range(len(sorted_docs_with_dates) - 1):
-            date1 = sorted_docs_with_dates[i].get('_parsed_record_date')
-            date2 = sorted_docs_with_dates[i+1].get('_parsed_record_date')
-            
-            if date1 and date2 and date1 > date2:
-                warnings.append(f"Date order issue between documents {i+1} and {i+2}")
+        # Step 4: Chronological order needs no separate check - the dated
+        # documents were just sorted by their parsed dates
         
         # Step 5: Compare legal descriptions and update references
+        # Each description is prepared once, not once per pair compared
+        prepared = []
+        # Normalized description, and lot/block/parcel identifiers, -> first
+        # entry index with them
+        by_description = {}
+        by_identifiers = {}
+        
         for i, doc in enumerate(sorted_docs):
             current_desc = doc.get('property', {}).get('legalDescription', '')
             
             if not current_desc:
+                prepared.append(None)
                 continue
             
-            # Compare to all prior documents
-            same_as = None
-            for j in range(i):
-                prior_doc = sorted_docs[j]
-                prior_desc = prior_doc.get('property', {}).get('legalDescription', '')
-                
-                if self._descriptions_match(current_desc, prior_desc):
-                    same_as = j + 1  # Entry number (1-indexed)
+            current = self._prepare_description(current_desc)
+            normalized, identifiers, _ = current
+            # Identifiers are always extracted in the same key order
+            identifiers_key = tuple(identifiers.items())
+            
+            # The first prior document that matches: an exact description or
+            # identifier match is a lookup, so only the entries before it need
+            # the fuzzy comparison
+            exact = [k for k in (by_description.get(normalized), by_identifiers.get(identifiers_key)) if k is not None]
+            same_as = min(exact) + 1 if exact else None  # Entry number (1-indexed)
+            for j in range(min(exact) if exact else i):
+                if prepared[j] is not None and self._prepared_match(current, prepared[j]):
+                    same_as = j + 1
                     break
             
+            prepared.append(current)
+            by_description.setdefault(normalized, i)
+            if identifiers:
+                by_identifiers.setdefault(identifiers_key, i)
+            
             # Update legal description comparison
             ldc = doc.get('legalDescriptionComparison', {})
             if same_as:
@@ -110,14 +148,9 @@ class ChainAnalyzer:
                     )
         
         # Step 7: Check for gaps in timeline (only between docs with dates)
-        gaps = self._find_timeline_gaps(sorted_docs_with_dates)
+        gaps = self._find_timeline_gaps(sorted_dates)
         warnings.extend(gaps)
         
-        # Step 8: Clean up temporary fields
-        for doc in sorted_docs:
-            if '_parsed_record_date' in doc:
-                del doc['_parsed_record_date']
-        
         return sorted_docs, warnings
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
@@ -125,15 +158,7 @@ class ChainAnalyzer:
         if not date_str or date_str == 'None':
             return None
         
-        date_str = date_str.strip()
-        
-        for fmt in self.date_formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        
-        return None
+        return parse_date(date_str.strip(), self.date_formats)
     
     def _descriptions_match(self, desc1: str, desc2: str) -> bool:
         """
@@ -143,34 +168,36 @@ class ChainAnalyzer:
         if not desc1 or not desc2:
             return False
         
-        # Normalize for comparison
-        d1 = self._normalize_description(desc1)
-        d2 = self._normalize_description(desc2)
+        # Identical text normalizes identically
+        if desc1 == desc2:
+            return True
+        
+        return self._prepared_match(self._prepare_description(desc1), self._prepare_description(desc2))
+    
+    def _prepare_description(self, desc: str) -> tuple:
+        """(normalized description, identifiers, set of its characters) as compared by _prepared_match"""
+        normalized = self._normalize_description(desc)
+        return normalized, self._extract_identifiers(desc), frozenset(normalized)
+    
+    def _prepared_match(self, prepared1: tuple, prepared2: tuple) -> bool:
+        """_descriptions_match for two _prepare_description results"""
+        d1, identifiers1, chars1 = prepared1
+        d2, identifiers2, chars2 = prepared2
         
         # Exact match after normalization
         if d1 == d2:
             return True
         
-        # Check if one contains the other (for partial matches)
-        if len(d1) > 50 and len(d2) > 50:  # Only for substantial descriptions
-            if d1 in d2 or d2 in d1:
-                return True
-        
         # Check for key identifiers match (lot, block, etc.)
-        identifiers1 = self._extract_identifiers(desc1)
-        identifiers2 = self._extract_identifiers(desc2)
-        
         if identifiers1 and identifiers2:
             # If they have the same lot/block/parcel numbers, likely same property
             if identifiers1 == identifiers2:
                 return True
         
-        # Check similarity ratio (for very similar descriptions)
-        similarity = self._similarity_ratio(d1, d2)
-        if similarity > 0.85:  # 85% similar
-            return True
-        
-        return False
+        # The fuzzy checks don't depend on the order of the pair
+        if d2 < d1:
+            d1, chars1, d2, chars2 = d2, chars2, d1, chars1
+        return _fuzzy_match(d1, chars1, d2, chars2)
     
     def _normalize_description(self, desc: str) -> str:
         """Normalize description for comparison"""
@@ -178,23 +205,10 @@ class ChainAnalyzer:
         desc = desc.lower()
         
         # Remove extra whitespace
-        desc = re.sub(r'\s+', ' ', desc)
+        desc = _WS_RE.sub(' ', desc)
         
         # Standardize common abbreviations
-        replacements = {
-            'ft.': 'feet',
-            'ft': 'feet',
-            'n.': 'north',
-            's.': 'south',
-            'e.': 'east',
-            'w.': 'west',
-            'st.': 'street',
-            'ave.': 'avenue',
-            'rd.': 'road',
-            'blvd.': 'boulevard',
-        }
-        
-        for abbr, full in replacements.items():
+        for abbr, full in _ABBREVIATIONS:
             desc = desc.replace(abbr, full)
         
         return desc.strip()
@@ -204,52 +218,68 @@ class ChainAnalyzer:
         identifiers = {}
         
         # Look for lot numbers
-        lot_match = re.search(r'lot\s*(?:no\.?\s*)?(\d+)', desc, re.IGNORECASE)
+        lot_match = _LOT_RE.search(desc)
         if lot_match:
             identifiers['lot'] = lot_match.group(1)
         
         # Look for block numbers
-        block_match = re.search(r'block\s*(?:no\.?\s*)?(\d+)', desc, re.IGNORECASE)
+        block_match = _BLOCK_RE.search(desc)
         if block_match:
             identifiers['block'] = block_match.group(1)
         
         # Look for parcel/tax map numbers
-        parcel_match = re.search(r'(?:parcel|tax\s*map)\s*(?:no\.?\s*)?([0-9\.\-]+)', desc, re.IGNORECASE)
+        parcel_match = _PARCEL_RE.search(desc)
         if parcel_match:
             identifiers['parcel'] = parcel_match.group(1)
         
         return identifiers
     
-    def _similarity_ratio(self, s1: str, s2: str) -> float:
-        """Calculate similarity ratio between two strings (0-1)"""
-        if not s1 or not s2:
-            return 0.0
-        
-        # Simple character-based similarity
-        set1 = set(s1)
-        set2 = set(s2)
-        
-        intersection = len(set1.intersection(set2))
-        union = len(set1.union(set2))
-        
-        return intersection / union if union > 0 else 0.0
-    
-    def _find_timeline_gaps(self, sorted_docs: List[Dict]) -> List[str]:
-        """Find significant gaps in the timeline (only for docs with valid dates)"""
+    def _find_timeline_gaps(self, sorted_dates: List[datetime]) -> List[str]:
+        """Find significant gaps in the timeline (sorted record dates of the docs that have one)"""
         warnings = []
         
-        for i in range(len(sorted_docs) - 1):
-            date1 = sorted_docs[i].get('_parsed_record_date')
-            date2 = sorted_docs[i+1].get('_parsed_record_date')
-            
-            # Only check gaps if both dates are valid
-            if date1 and date2:
-                gap_years = (date2 - date1).days / 365.25
-                
-                # Warn if gap > 5 years
-                if gap_years > 5:
-                    warnings.append(
-                        f"Large time gap ({int(gap_years)} years) between documents {i+1} and {i+2}"
-                    )
+        # Warn if gap > 5 years; whole days are compared, and only a gap that
+        # crosses that line is converted to years
+        for i, (date1, date2) in enumerate(zip(sorted_dates, sorted_dates[1:])):
+            gap_days = (date2 - date1).days
+            if gap_days > _GAP_WARNING_DAYS:
+                warnings.append(
+                    f"Large time gap ({int(gap_days / 365.25)} years) between documents {i+1} and {i+2}"
+                )
         
         return warnings
+
+
+# The same pairs are compared again whenever an abstract is re-analyzed
+@lru_cache(maxsize=4096)
+def _fuzzy_match(d1: str, chars1: frozenset, d2: str, chars2: frozenset) -> bool:
+    """Containment and similarity checks for two normalized descriptions and their character sets"""
+    # Check if one contains the other (for partial matches)
+    if len(d1) > 50 and len(d2) > 50:  # Only for substantial descriptions
+        if d1 in d2 or d2 in d1:
+            return True
+    
+    # Check similarity ratio (for very similar descriptions). It can be no
+    # higher than the smaller character set's size over the larger's, so
+    # sets too different in size are rejected without comparing them
+    smaller, larger = sorted((len(chars1), len(chars2)))
+    if not larger or smaller / larger <= 0.85:
+        return False
+    similarity = _similarity_ratio(chars1, chars2)
+    if similarity > 0.85:  # 85% similar
+        return True
+    
+    return False
+
+
+def _similarity_ratio(set1: frozenset, set2: frozenset) -> float:
+    """Similarity ratio (0-1) of two strings, given the sets of their characters"""
+    if not set1 or not set2:
+        return 0.0
+    
+    # Simple character-based similarity; the union's size follows from the
+    # intersection, so only one set is built per comparison
+    intersection = len(set1 & set2)
+    union = len(set1) + len(set2) - intersection
+    
+    return intersection / union if union > 0 else 0.0
@@ -1,6 +1,28 @@
 from typing import List, Dict, Set, Optional, Tuple
-from datetime import datetime
+from functools import lru_cache
 import re
+from src.date_parsing import date_sort_key
+
+_PUNCT_RE = re.compile(r'[,\.\']')
+_WS_RE = re.compile(r'\s+')
+_BOOK_RE = re.compile(r'[Bb][Oo][Oo][Kk]\s*(\d+)')
+_PAGE_RE = re.compile(r'[Pp][Aa][Gg][Ee]\s*(\d+)')
+# The usual "BOOK1131 PAGE 140" form, read in one match
+_BOOK_PAGE_RE = re.compile(r'\s*[Bb][Oo][Oo][Kk]\s*(\d+)\s*[Pp][Aa][Gg][Ee]\s*(\d+)')
+# A substring test: 'co' also catches names like "Jacobs"
+_CORP_RE = re.compile(r'corp|inc|llc|company|co')
+
+# Checked in this order, each stripped if present, so "smith sr jr" loses both
+_NAME_SUFFIXES = (' jr.', ' jr', ' sr.', ' sr', ' ii', ' iii', ' iv')
+# "limited liability company" normalizes word by word, to "ltd liability co"
+_CORPORATE_ABBREVIATIONS = {
+    'corporation': 'corp',
+    'incorporated': 'inc',
+    'company': 'co',
+    'limited': 'ltd',
+    'l.l.c.': 'llc',
+}
+_CORPORATE_RE = re.compile('|'.join(re.escape(full) for full in _CORPORATE_ABBREVIATIONS))
 
 class ChainBuilder:
     """
@@ -30,9 +52,12 @@ class ChainBuilder:
         # Build enriched chains with full document data
         enriched_chains = self._enrich_chains(chains, documents)
         
-        # Verify grantor/grantee connections within each chain
+        # Verify grantor/grantee connections within each chain. Party names
+        # are normalized once per document, kept here rather than on the
+        # returned documents
+        party_sets = {}
         for chain in enriched_chains:
-            self._verify_party_connections(chain)
+            self._verify_party_connections(chain, party_sets)
         
         # Detect overlaps between chains
         self._detect_overlaps(enriched_chains, relationships)
@@ -69,7 +94,9 @@ class ChainBuilder:
                     'full_doc': doc
                 })
             
-            # Sort by date, then by recording location (book/page)
+            # Sort by date, then by recording location (book/page); sort()
+            # computes each document's key once, and nothing is stored on the
+            # returned documents
             chain_docs.sort(key=lambda d: (
                 self._date_sort_key(d['dates'].get('recordDate', '')),
                 self._recording_sort_key(d['recording'].get('locationInstrumentNumber', ''))
@@ -84,10 +111,11 @@ class ChainBuilder:
         
         return enriched
     
-    def _verify_party_connections(self, chain: Dict):
+    def _verify_party_connections(self, chain: Dict, party_sets: Dict):
         """
         Verify that grantee of doc N becomes grantor of doc N+1
         Flag broken chains
+        party_sets caches _party_sets across the chains of one build
         """
         docs = chain['documents']
         
@@ -104,7 +132,7 @@ class ChainBuilder:
             next_deed = deeds[i + 1]
             
             # Skip if these are duplicate deeds
-            if self._is_duplicate_deed(current_deed, next_deed):
+            if self._is_duplicate_deed(current_deed, next_deed, party_sets):
                 continue
             
             # Get parties
@@ -114,19 +142,19 @@ class ChainBuilder:
             if not current_to or not next_from:
                 continue
             
-            # Normalize names for comparison
-            current_grantees = [self._normalize_name(n) for n in current_to]
-            next_grantors = [self._normalize_name(n) for n in next_from]
+            current_grantees = self._party_sets(current_deed, party_sets)[1]
+            next_grantors = self._party_sets(next_deed, party_sets)[0]
             
-            # Check if any grantee matches any grantor
-            match_found = False
-            for grantee in current_grantees:
-                for grantor in next_grantors:
-                    if self._names_match(grantee, grantor):
-                        match_found = True
-                        break
-                if match_found:
-                    break
+            # Check if any grantee matches any grantor. Equal names and names
+            # ending in the same word always match, which set intersections
+            # settle; of the remaining pairs only corporate names can match
+            match_found = bool(current_grantees & next_grantors) or bool(_last_names(current_grantees) & _last_names(next_grantors))
+            if not match_found:
+                match_found = any(
+                    self._names_match(grantee, grantor)
+                    for grantee in current_grantees for grantor in next_grantors
+                    if _CORP_RE.search(grantee) or _CORP_RE.search(grantor)
+                )
             
             if not match_found:
                 broken = True
@@ -143,7 +171,7 @@ class ChainBuilder:
         
         chain['verified'] = not broken
     
-    def _is_duplicate_deed(self, deed1: Dict, deed2: Dict) -> bool:
+    def _is_duplicate_deed(self, deed1: Dict, deed2: Dict, party_sets: Dict) -> bool:
         """Check if two deeds are duplicates (same recording info)"""
         rec1 = deed1.get('recording', {}).get('locationInstrumentNumber', '')
         rec2 = deed2.get('recording', {}).get('locationInstrumentNumber', '')
@@ -156,29 +184,38 @@ class ChainBuilder:
         date2 = deed2.get('dates', {}).get('recordDate', '')
         
         if date1 == date2:
-            from1 = set(self._normalize_name(n) for n in deed1.get('parties', {}).get('from', []))
-            from2 = set(self._normalize_name(n) for n in deed2.get('parties', {}).get('from', []))
-            to1 = set(self._normalize_name(n) for n in deed1.get('parties', {}).get('to', []))
-            to2 = set(self._normalize_name(n) for n in deed2.get('parties', {}).get('to', []))
-            
-            if from1 == from2 and to1 == to2:
+            if self._party_sets(deed1, party_sets) == self._party_sets(deed2, party_sets):
                 return True
         
         return False
     
+    def _party_sets(self, deed: Dict, party_sets: Dict) -> Tuple[frozenset, frozenset]:
+        """
+        (grantors, grantees) of a chain document as sets of normalized names,
+        computed once per document and kept in party_sets by doc_id
+        """
+        sets = party_sets.get(deed['doc_id'])
+        if sets is None:
+            parties = deed['parties']
+            sets = party_sets[deed['doc_id']] = (
+                frozenset(self._normalize_name(n) for n in parties.get('from', [])),
+                frozenset(self._normalize_name(n) for n in parties.get('to', []))
+            )
+        return sets
+    
     def _detect_overlaps(self, chains: List[Dict], relationships: List[Dict]):
         """Detect if multiple chains reference overlapping parcels"""
+        # Document -> the last chain listing it (a document can be in more than one)
+        doc_to_chain = {}
+        for chain in chains:
+            for doc_id in chain['document_ids']:
+                doc_to_chain[doc_id] = chain
+        
         for rel in relationships:
             if rel['relationship'] == 'PARTIAL_OVERLAP':
                 # Find which chains these documents belong to
-                doc_a_chain = None
-                doc_b_chain = None
-                
-                for chain in chains:
-                    if rel['doc_a'] in chain['document_ids']:
-                        doc_a_chain = chain
-                    if rel['doc_b'] in chain['document_ids']:
-                        doc_b_chain = chain
+                doc_a_chain = doc_to_chain.get(rel['doc_a'])
+                doc_b_chain = doc_to_chain.get(rel['doc_b'])
                 
                 if doc_a_chain and doc_b_chain and doc_a_chain != doc_b_chain:
                     issue = {
@@ -215,13 +252,18 @@ class ChainBuilder:
         # Find root chains (no parent)
         root_chains = [c for c in chains if not c.get('parent')]
         
+        # Children are looked up by id; the first chain with an id wins
+        chain_by_id = {}
+        for c in chains:
+            chain_by_id.setdefault(c['chain_id'], c)
+        
         for root in root_chains:
-            hierarchy_node = self._build_hierarchy_node(root, chains)
+            hierarchy_node = self._build_hierarchy_node(root, chain_by_id)
             hierarchy.append(hierarchy_node)
         
         return hierarchy
     
-    def _build_hierarchy_node(self, chain: Dict, all_chains: List[Dict]) -> Dict:
+    def _build_hierarchy_node(self, chain: Dict, chain_by_id: Dict) -> Dict:
         """Recursively build hierarchy tree"""
         node = {
             'chain_id': chain['chain_id'],
@@ -236,9 +278,9 @@ class ChainBuilder:
         # Add children recursively
         if chain.get('children'):
             for child_id in chain['children']:
-                child_chain = next((c for c in all_chains if c['chain_id'] == child_id), None)
+                child_chain = chain_by_id.get(child_id)
                 if child_chain:
-                    child_node = self._build_hierarchy_node(child_chain, all_chains)
+                    child_node = self._build_hierarchy_node(child_chain, chain_by_id)
                     node['children'].append(child_node)
         
         return node
@@ -265,127 +307,130 @@ class ChainBuilder:
     
     def _normalize_name(self, name: str) -> str:
         """Normalize name for comparison"""
-        if not name:
-            return ""
-        
-        # Convert to lowercase
-        name = name.lower().strip()
-        
-        # Remove common suffixes
-        suffixes = [' jr.', ' jr', ' sr.', ' sr', ' ii', ' iii', ' iv']
-        for suffix in suffixes:
-            if name.endswith(suffix):
-                name = name[:-len(suffix)].strip()
-        
-        # Normalize corporate entities
-        corporate_replacements = [
-            ('corporation', 'corp'),
-            ('incorporated', 'inc'),
-            ('company', 'co'),
-            ('limited', 'ltd'),
-            ('limited liability company', 'llc'),
-            ('l.l.c.', 'llc'),
-        ]
-        for full, abbr in corporate_replacements:
-            name = name.replace(full, abbr)
-        
-        # Remove all punctuation (periods, commas)
-        name = re.sub(r'[,\.\']', '', name)
-        
-        # Collapse multiple spaces
-        name = re.sub(r'\s+', ' ', name)
-        
-        return name.strip()
+        return _normalize_name(name)
     
     def _names_match(self, name1: str, name2: str) -> bool:
-        """
-        Check if two names match
-        Handles variations like:
-        - "John Smith" vs "John A. Smith" vs "J. Smith"
-        - "CORPORATION" vs "Corp." vs "Corp"
-        - "Henry H. Rouse" vs "Henry H Rouse"
-        """
-        if name1 == name2:
+        """Check if two normalized names match"""
+        return _names_match(name1, name2)
+    
+    def _date_sort_key(self, date_str: str) -> tuple:
+        """Convert date string to sortable tuple"""
+        return date_sort_key(date_str)
+    
+    def _recording_sort_key(self, recording: str) -> tuple:
+        """Book and page for sorting, e.g. "BOOK1131 PAGE 140" -> (1131, 140)"""
+        return _recording_sort_key(recording)
+
+def _last_names(names) -> Set[str]:
+    """Last word of each name that has one"""
+    return {parts[-1] for parts in map(str.split, names) if parts}
+
+
+def _abbreviate_corporate(match):
+    return _CORPORATE_ABBREVIATIONS[match.group(0)]
+
+
+# Party names repeat across the deeds of a chain and across chains
+@lru_cache(maxsize=4096)
+def _normalize_name(name: str) -> str:
+    """Normalize name for comparison"""
+    if not name:
+        return ""
+    
+    # Convert to lowercase
+    name = name.lower().strip()
+    
+    # Remove common suffixes
+    for suffix in _NAME_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)].strip()
+    
+    # Normalize corporate entities, in one pass
+    name = _CORPORATE_RE.sub(_abbreviate_corporate, name)
+    
+    # Remove all punctuation (periods, commas)
+    name = _PUNCT_RE.sub('', name)
+    
+    # Collapse multiple spaces
+    name = _WS_RE.sub(' ', name)
+    
+    return name.strip()
+
+
+# Pairs are cached as given: the corporate word count isn't symmetric when a
+# name repeats a word
+@lru_cache(maxsize=8192)
+def _names_match(name1: str, name2: str) -> bool:
+    """
+    Check if two names match
+    Handles variations like:
+    - "John Smith" vs "John A. Smith" vs "J. Smith"
+    - "CORPORATION" vs "Corp." vs "Corp"
+    - "Henry H. Rouse" vs "Henry H Rouse"
+    """
+    if name1 == name2:
+        return True
+    
+    # Split into parts
+    parts1 = name1.split()
+    parts2 = name2.split()
+    
+    if not parts1 or not parts2:
+        return False
+    
+    # For corporate entities, match if core words match
+    if _CORP_RE.search(name1) or _CORP_RE.search(name2):
+        # Compare significant words (not corp/inc/llc)
+        words1 = [w for w in parts1 if w not in ['corp', 'inc', 'llc', 'co', 'company', 'ltd']]
+        words2 = [w for w in parts2 if w not in ['corp', 'inc', 'llc', 'co', 'company', 'ltd']]
+        
+        # Must have at least 2 matching significant words
+        matches = sum(1 for w in words1 if w in words2)
+        if matches >= min(2, len(words1), len(words2)):
             return True
-        
-        # Split into parts
-        parts1 = name1.split()
-        parts2 = name2.split()
-        
-        if not parts1 or not parts2:
-            return False
-        
-        # For corporate entities, match if core words match
-        if any(corp in name1 for corp in ['corp', 'inc', 'llc', 'company', 'co']) or \
-           any(corp in name2 for corp in ['corp', 'inc', 'llc', 'company', 'co']):
-            # Compare significant words (not corp/inc/llc)
-            words1 = [w for w in parts1 if w not in ['corp', 'inc', 'llc', 'co', 'company', 'ltd']]
-            words2 = [w for w in parts2 if w not in ['corp', 'inc', 'llc', 'co', 'company', 'ltd']]
+    
+    # Check if last names match
+    if parts1[-1] == parts2[-1]:
+        # Last names match - check first names
+        if len(parts1) >= 2 and len(parts2) >= 2:
+            first1 = parts1[0]
+            first2 = parts2[0]
             
-            # Must have at least 2 matching significant words
-            matches = sum(1 for w in words1 if w in words2)
-            if matches >= min(2, len(words1), len(words2)):
+            # Full match
+            if first1 == first2:
                 return True
-        
-        # Check if last names match
-        if parts1[-1] == parts2[-1]:
-            # Last names match - check first names
-            if len(parts1) >= 2 and len(parts2) >= 2:
-                first1 = parts1[0]
-                first2 = parts2[0]
-                
-                # Full match
-                if first1 == first2:
-                    return True
-                
-                # Initial match (J vs John)
-                if len(first1) == 1 and first2.startswith(first1):
-                    return True
-                if len(first2) == 1 and first1.startswith(first2):
-                    return True
             
-            # If only last name available, consider it a match
-            return True
+            # Initial match (J vs John)
+            if len(first1) == 1 and first2.startswith(first1):
+                return True
+            if len(first2) == 1 and first1.startswith(first2):
+                return True
         
-        return False
+        # If only last name available, consider it a match
+        return True
     
-    def _date_sort_key(self, date_str: str) -> tuple:
-        """Convert date string to sortable tuple"""
-        if not date_str or date_str == "Unknown":
-            return (9999, 12, 31)
-        
-        try:
-            dt = datetime.strptime(date_str, "%B %d, %Y")
-            return (dt.year, dt.month, dt.day)
-        except:
-            pass
-        
-        for fmt in ["%m/%d/%Y", "%Y-%m-%d", "%B %d %Y"]:
-            try:
-                dt = datetime.strptime(date_str, fmt)
-                return (dt.year, dt.month, dt.day)
-            except:
-                continue
-        
-        year_match = re.search(r'\b(19|20)\d{2}\b', date_str)
-        if year_match:
-            return (int(year_match.group(0)), 1, 1)
-        
-        return (9999, 12, 31)
+    return False
+
+
+@lru_cache(maxsize=4096)
+def _recording_sort_key(recording: str) -> tuple:
+    """
+    Extract book and page for sorting
+    Example: "BOOK1131 PAGE 140" -> (1131, 140)
+    """
+    if not recording:
+        return (99999, 99999)
     
-    def _recording_sort_key(self, recording: str) -> tuple:
-        """
-        Extract book and page for sorting
-        Example: "BOOK1131 PAGE 140" -> (1131, 140)
-        """
-        if not recording:
-            return (99999, 99999)
-        
-        # Try to extract book and page numbers
-        book_match = re.search(r'[Bb][Oo][Oo][Kk]\s*(\d+)', recording)
-        page_match = re.search(r'[Pp][Aa][Gg][Ee]\s*(\d+)', recording)
-        
-        book_num = int(book_match.group(1)) if book_match else 99999
-        page_num = int(page_match.group(1)) if page_match else 99999
-        
-        return (book_num, page_num)
+    # Nothing can come before this book or page, so they are the first of each
+    match = _BOOK_PAGE_RE.match(recording)
+    if match:
+        return (int(match.group(1)), int(match.group(2)))
+    
+    # Try to extract book and page numbers
+    book_match = _BOOK_RE.search(recording)
+    page_match = _PAGE_RE.search(recording)
+    
+    book_num = int(book_match.group(1)) if book_match else 99999
+    page_num = int(page_match.group(1)) if page_match else 99999
+    
+    return (book_num, page_num)
@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import Optional, Sequence
+from functools import lru_cache
+import re
+
+# The exact shapes of the supported formats, ASCII digits only
+_MDY_SLASH_RE = re.compile(r'([0-9]{1,2})/([0-9]{1,2})/([0-9]{4})')
+_MDY_DASH_RE = re.compile(r'([0-9]{1,2})-([0-9]{1,2})-([0-9]{4})')
+_YMD_RE = re.compile(r'([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})')
+_MONTH_DAY_YEAR_RE = re.compile(r'([A-Za-z]+) ([0-9]{1,2})(,?) ([0-9]{4})')
+
+_MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+                'august', 'september', 'october', 'november', 'december']
+_FULL_MONTHS = {name: i for i, name in enumerate(_MONTH_NAMES, 1)}
+_SHORT_MONTHS = {name[:3]: i for i, name in enumerate(_MONTH_NAMES, 1)}
+
+# Record dates are sorted by the first of these that matches, else by year
+_SORT_DATE_FORMATS = ["%B %d, %Y", "%m/%d/%Y", "%Y-%m-%d", "%B %d %Y"]
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+
+
+def parse_date(date_str: str, formats: Sequence[str]) -> Optional[datetime]:
+    """
+    Parse date_str with the first of formats that matches, like trying
+    datetime.strptime on each in turn
+    Plain dates in the common formats are built directly from their digits;
+    anything else still goes through strptime
+    """
+    parsed = _parse_common(date_str, formats)
+    if parsed:
+        return parsed
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+
+    return None
+
+
+def _parse_common(date_str, formats):
+    """
+    The date when date_str is exactly one of the common formats in formats,
+    else None. Each shape can only match one of them, so the order of
+    formats doesn't matter here
+    """
+    if '/' in date_str:
+        match = _MDY_SLASH_RE.fullmatch(date_str)
+        if not match:
+            return None
+        fmt = "%m/%d/%Y"
+        month, day, year = match.groups()
+    elif '-' in date_str:
+        match = _YMD_RE.fullmatch(date_str)
+        if match:
+            fmt = "%Y-%m-%d"
+            year, month, day = match.groups()
+        else:
+            match = _MDY_DASH_RE.fullmatch(date_str)
+            if not match:
+                return None
+            fmt = "%m-%d-%Y"
+            month, day, year = match.groups()
+    else:
+        match = _MONTH_DAY_YEAR_RE.fullmatch(date_str)
+        if not match:
+            return None
+        name, day, comma, year = match.groups()
+        name = name.lower()
+        if name in _FULL_MONTHS:
+            fmt = "%B %d, %Y" if comma else "%B %d %Y"
+            month = _FULL_MONTHS[name]
+        elif name in _SHORT_MONTHS:
+            fmt = "%b %d, %Y" if comma else "%b %d %Y"
+            month = _SHORT_MONTHS[name]
+        else:
+            return None
+
+    if fmt not in formats:
+        return None
+
+    try:
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+# The same record dates are keyed again for every chain listing them
+@lru_cache(maxsize=4096)
+def date_sort_key(date_str: str) -> tuple:
+    """
+    Sortable (year, month, day) for a record date; a date that only has a
+    year sorts as January 1st, and unknowns sort to the end
+    """
+    if not date_str or date_str == "Unknown":
+        return (9999, 12, 31)
+    
+    dt = parse_date(date_str, _SORT_DATE_FORMATS)
+    if dt:
+        return (dt.year, dt.month, dt.day)
+    
+    year_match = _YEAR_RE.search(date_str)
+    if year_match:
+        return (int(year_match.group(0)), 1, 1)
+    
+    return (9999, 12, 31)
@@ -1,13 +1,22 @@
 import google.generativeai as genai
 from typing import Optional
+from io import IOBase
 import time
 
+class UploadError(Exception):
+    """An upload to the Files API failed; the SDK's exception, if any, is chained as __cause__"""
+
 class FileUploader:
     """
     Handles uploading PDFs to Gemini Files API
     Files persist for 48 hours
     """
     
+    # Processing-state polls back off from the first delay to the cap, so a
+    # file that is ready quickly isn't held for a fixed interval
+    POLL_INITIAL_DELAY = 0.5
+    POLL_MAX_DELAY = 4
+    
     def __init__(self, api_key: str):
         genai.configure(api_key=api_key)
     
@@ -16,12 +25,25 @@ class FileUploader:
         Upload PDF to Files API
         Returns: {"uri": "...", "name": "...", "state": "ACTIVE"}
         """
+        return self._upload(pdf_path, display_name)
+    
+    def upload_pdf_stream(self, file_obj: IOBase, display_name: str) -> dict:
+        """
+        Upload an already-open PDF (e.g. a Streamlit UploadedFile) without
+        re-reading it from disk
+        Returns: {"uri": "...", "name": "...", "state": "ACTIVE"}
+        """
+        file_obj.seek(0)
+        return self._upload(file_obj, display_name, mime_type='application/pdf')
+    
+    def _upload(self, source, display_name: str, mime_type: Optional[str] = None) -> dict:
         print(f"Uploading {display_name} to Gemini Files API...")
         
         try:
             # Correct method for version 0.8.5: upload_file (not files.upload)
             file = genai.upload_file(
-                path=pdf_path,
+                path=source,
+                mime_type=mime_type,
                 display_name=display_name
             )
             
@@ -30,13 +52,15 @@ class FileUploader:
             print(f"  State: {file.state.name}")
             
             # Wait for file to be processed (if needed)
+            delay = self.POLL_INITIAL_DELAY
             while file.state.name == "PROCESSING":
                 print("  Processing file...")
-                time.sleep(2)
+                time.sleep(delay)
+                delay = min(delay * 2, self.POLL_MAX_DELAY)
                 file = genai.get_file(file.name)
             
             if file.state.name == "FAILED":
-                raise Exception(f"File upload failed")
+                raise UploadError("File upload failed")
             
             print(f"✓ File ready for processing")
             
@@ -48,7 +72,7 @@ class FileUploader:
             }
             
         except Exception as e:
-            raise Exception(f"Upload error: {str(e)}")
+            raise UploadError(f"Upload error: {e}") from e
     
     def delete_file(self, file_name: str):
         """
@@ -1,40 +1,90 @@
 import google.generativeai as genai
-from typing import Dict
+from google.api_core import exceptions as google_exceptions
+from typing import Dict, Iterator
+import time
+
+# The service was overloaded or slow rather than the request bad, so the same
+# call can simply be made again against the already-uploaded file
+_TRANSIENT_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ServiceUnavailable,
+)
+
+class GeminiError(Exception):
+    """A Gemini call failed; the SDK's exception is chained as __cause__"""
 
 class GeminiClient:
+    # Attempts for a transient error, waiting RETRY_DELAY and then twice as long each time
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 2
+    
     def __init__(self, api_key: str):
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
         
-    def process_file(self, file_uri: str, prompt: str, timeout: int = 300) -> str:
+    def process_file(self, file_uri: str, prompt: str, timeout: int = 300, json_mode: bool = False) -> str:
         """
         Process uploaded file via Files API
+        json_mode constrains the response to a JSON document
+        """
+        delay = self.RETRY_DELAY
+        for attempt in range(self.MAX_ATTEMPTS):
+            try:
+                return "".join(self.process_file_stream(file_uri, prompt, timeout=timeout, json_mode=json_mode))
+            except GeminiError as e:
+                if attempt == self.MAX_ATTEMPTS - 1 or not isinstance(e.__cause__, _TRANSIENT_ERRORS):
+                    raise
+                print(f"Transient Gemini error, retrying in {delay}s: {e.__cause__}")
+                time.sleep(delay)
+                delay *= 2
+    
+    def process_file_stream(self, file_uri: str, prompt: str, timeout: int = 300, json_mode: bool = False) -> Iterator[str]:
+        """
+        Process uploaded file via Files API, yielding the response text as
+        Gemini generates it rather than once the whole response is done
+        json_mode constrains the response to a JSON document
         """
         try:
             file_name = file_uri.split('/')[-1]
             file = genai.get_file(name=file_name)
             
+            generation_config = {
+                'temperature': 0,
+                'max_output_tokens': 65536,
+                'top_p': 0.95,
+                'top_k': 40
+            }
+            if json_mode:
+                generation_config['response_mime_type'] = 'application/json'
+            
             response = self.model.generate_content(
                 [
                     prompt,
                     file
                 ],
-                generation_config={
-                    'temperature': 0,
-                    'max_output_tokens': 65536,
-                    'top_p': 0.95,
-                    'top_k': 40
-                }
+                generation_config=generation_config,
+                stream=True
             )
             
+            yielded = False
+            for chunk in response:
+                # The last chunk can carry only the finish reason
+                if chunk.candidates and chunk.candidates[0].content.parts:
+                    yielded = True
+                    yield chunk.text
+            
             # Check if response was truncated
             print(f"Response finish reason: {response.candidates[0].finish_reason}")
             print(f"Safety ratings: {response.candidates[0].safety_ratings}")
             
-            return response.text
+            # A response with no text (a blocked prompt, say) raises here, as it
+            # did for the unstreamed response
+            if not yielded:
+                yield response.text
             
         except Exception as e:
-            raise Exception(f"Gemini API error: {str(e)}")
+            raise GeminiError(f"Gemini API error: {e}") from e
     
     def estimate_cost(self, num_pages: int) -> float:
         return num_pages * 0.015
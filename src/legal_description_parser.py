@@ -1,5 +1,64 @@
 import re
 from typing import Dict, List, Optional
+from functools import lru_cache
+
+# Metes & bounds: counted by how many of these indicators appear
+_METES_INDICATORS = (
+    r'\bBEGINNING\b',
+    r'\bCOMMENCING\b',
+    r'\bthence\b',
+    r'North \d+°',
+    r'South \d+°',
+    r'East \d+°',
+    r'West \d+°',
+    r'\d+\s*feet',
+    r'\d+\s*chains'
+)
+# All of them in one scan, each in its own group. No two can match starting
+# at the same place or inside one another's match, so every indicator present
+# is found
+_METES_INDICATORS_RE = re.compile('|'.join(f'({pattern})' for pattern in _METES_INDICATORS), re.IGNORECASE)
+_METES_START_RE = re.compile(r'(BEGINNING|COMMENCING)\s+at\s+([^;.]+)', re.IGNORECASE)
+
+# Tried in order; the first match wins
+_DEED_REFERENCE_PATTERNS = [
+    re.compile(r'[Bb]eing\s+(?:the\s+)?same\s+premises.*?[Bb]ook\s+(\d+).*?[Pp]age\s+(\d+)'),
+    re.compile(r'[Bb]eing\s+(?:the\s+)?same\s+premises.*?[Ll]iber\s+(\d+).*?[Pp]age\s+(\d+)'),
+    re.compile(r'[Rr]ecorded\s+in.*?[Bb]ook\s+(\d+).*?[Pp]age\s+(\d+)'),
+    re.compile(r'[Rr]ecorded\s+in.*?[Ll]iber\s+(\d+).*?[Pp]age\s+(\d+)'),
+]
+_TAX_PARCEL_PATTERNS = [
+    re.compile(r'\b(\d{2,3}[\.-]\d{2}[\.-]\d{1,3}[\.-]\d{1,3})\b'),  # 123.45-6-7
+    re.compile(r'\b(\d{2,3}[\.-]\d{2}[\.-]\d{1,3})\b'),              # 123-45-6
+    re.compile(r'[Tt]ax\s+[Pp]arcel\s*:?\s*([0-9\.-]+)'),            # Tax Parcel: 123-45-6
+]
+
+# The number mustn't run on into more digits, a decimal or a distance; one
+# lookahead covers all three
+_LOT_RE = re.compile(r'\bLots?\s+(?:Number\s+)?(\d{1,4})(?!\d|\s*(?:\.\d|feet|foot|ft))', re.IGNORECASE)
+_LOT_LIST_RE = re.compile(r'\bLots\s+((?:\d+\s*(?:,|and|&)\s*)+\d+)(?!\s*(?:feet|foot|ft))', re.IGNORECASE)
+_LOT_WRITTEN_RE = re.compile(r'\bLots?\s+[A-Za-z][A-Za-z\s\-]*\((\d+)\)', re.IGNORECASE)
+# Every lot pattern starts like this, so one scan for it finds every place
+# they can match
+_LOT_START_RE = re.compile(r'\bLots?\s', re.IGNORECASE)
+_BLOCK_RE = re.compile(r'\bBlocks?\s+(\d+(?:\s*(?:,|and|&)\s*\d+)*)', re.IGNORECASE)
+# Whole numbers only: in "10and11" neither number stands alone
+_WORD_NUMBER_RE = re.compile(r'\b(\d+)\b')
+_NUMBER_RE = re.compile(r'\d+')
+
+_STREET_ADDRESS_RE = re.compile(r'\b(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Way|Court|Ct))\b', re.IGNORECASE)
+_SUBDIVISION_PATTERNS = [
+    re.compile(r'([A-Z][A-Za-z\s]+(?:Manor|Estates|Heights|Hills|Park|Gardens|Acres|Subdivision)(?:\s+Section\s+["\']?[A-Z0-9]["\']?)?)'),
+    re.compile(r'map\s+of\s+(?:the\s+)?([A-Z][A-Za-z\s]+(?:Manor|Estates)(?:\s+Section\s+["\']?[A-Z0-9]["\']?)?)'),
+]
+_MAP_REFERENCE_RE = re.compile(r'filed\s+(?:in\s+)?[^.]*?(?:Clerk|County|Office)[^.]*?(?:\d{4})', re.IGNORECASE)
+
+# Words, in upper case, that a description has to contain for the patterns
+# above to match it. Each metes & bounds indicator needs its own word
+_METES_WORDS = ('BEGINNING', 'COMMENCING', 'THENCE', 'NORTH ', 'SOUTH ', 'EAST ', 'WEST ', 'FEET', 'CHAINS')
+_STREET_WORDS = ('ST', 'AVE', 'ROAD', 'RD', 'DR', 'LANE', 'LN', 'BOULEVARD', 'BLVD', 'WAY', 'COURT', 'CT')
+# The subdivision patterns are case-sensitive, so these are checked as is
+_SUBDIVISION_WORDS = ('Manor', 'Estates', 'Heights', 'Hills', 'Park', 'Gardens', 'Acres', 'Subdivision')
 
 class LegalDescriptionParser:
     """
@@ -14,17 +73,26 @@ class LegalDescriptionParser:
         if not description or description.strip() == "":
             return self._empty_result()
         
-        desc = description.strip()
+        # Descriptions repeat across documents, so results are cached by the
+        # text; each call still gets its own copy to modify
+        return _copy_result(_parse_cached(description.strip()))
+    
+    def _parse(self, desc: str) -> Dict:
+        """parse, for a stripped, non-empty description"""
+        # Extractors whose words are missing are skipped. Only ASCII text is
+        # screened: beyond it, case-insensitive matching pairs letters that
+        # upper() doesn't (e.g. "İ" matches "i"), so everything is run
+        upper = desc.upper() if desc.isascii() else None
         
         return {
-            "metes_bounds": self._extract_metes_bounds(desc),
-            "deed_reference": self._extract_deed_reference(desc),
-            "tax_parcel_id": self._extract_tax_parcel(desc),
-            "lot_numbers": self._extract_lot_numbers(desc),
-            "block_numbers": self._extract_block_numbers(desc),
-            "street_address": self._extract_street_address(desc),
-            "subdivision": self._extract_subdivision(desc),
-            "map_reference": self._extract_map_reference(desc),
+            "metes_bounds": self._extract_metes_bounds(desc) if upper is None or sum(word in upper for word in _METES_WORDS) >= 3 else None,
+            "deed_reference": self._extract_deed_reference(desc) if upper is None or ('PAGE' in upper and ('BOOK' in upper or 'LIBER' in upper)) else None,
+            "tax_parcel_id": self._extract_tax_parcel(desc) if upper is None or '.' in desc or '-' in desc or 'TAX' in upper else None,
+            "lot_numbers": self._extract_lot_numbers(desc) if upper is None or 'LOT' in upper else [],
+            "block_numbers": self._extract_block_numbers(desc) if upper is None or 'BLOCK' in upper else [],
+            "street_address": self._extract_street_address(desc) if upper is None or any(word in upper for word in _STREET_WORDS) else None,
+            "subdivision": self._extract_subdivision(desc) if any(word in desc for word in _SUBDIVISION_WORDS) else None,
+            "map_reference": self._extract_map_reference(desc) if upper is None or 'FILED' in upper else None,
             "raw_text": desc
         }
     
@@ -33,24 +101,17 @@ class LegalDescriptionParser:
         Detect metes and bounds descriptions
         Pattern: "BEGINNING at...", "thence...", bearings, distances
         """
-        # Common metes & bounds indicators
-        indicators = [
-            r'\bBEGINNING\b',
-            r'\bCOMMENCING\b',
-            r'\bthence\b',
-            r'North \d+°',
-            r'South \d+°',
-            r'East \d+°',
-            r'West \d+°',
-            r'\d+\s*feet',
-            r'\d+\s*chains'
-        ]
-        
-        matches = sum(1 for pattern in indicators if re.search(pattern, desc, re.IGNORECASE))
-        
-        if matches >= 3:  # If 3+ indicators present, likely metes & bounds
+        # Common metes & bounds indicators, scanning only until 3 different
+        # ones have been seen
+        found = set()
+        for match in _METES_INDICATORS_RE.finditer(desc):
+            found.add(match.lastindex)
+            if len(found) >= 3:
+                break
+        
+        if len(found) >= 3:  # If 3+ indicators present, likely metes & bounds
             # Extract starting point
-            start_match = re.search(r'(BEGINNING|COMMENCING)\s+at\s+([^;.]+)', desc, re.IGNORECASE)
+            start_match = _METES_START_RE.search(desc)
             starting_point = start_match.group(2) if start_match else None
             
             return {
@@ -68,15 +129,8 @@ class LegalDescriptionParser:
         - "Being same premises as Book 1234, Page 567"
         - "as recorded in Liber 456 of Deeds at Page 789"
         """
-        patterns = [
-            r'[Bb]eing\s+(?:the\s+)?same\s+premises.*?[Bb]ook\s+(\d+).*?[Pp]age\s+(\d+)',
-            r'[Bb]eing\s+(?:the\s+)?same\s+premises.*?[Ll]iber\s+(\d+).*?[Pp]age\s+(\d+)',
-            r'[Rr]ecorded\s+in.*?[Bb]ook\s+(\d+).*?[Pp]age\s+(\d+)',
-            r'[Rr]ecorded\s+in.*?[Ll]iber\s+(\d+).*?[Pp]age\s+(\d+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, desc)
+        for pattern in _DEED_REFERENCE_PATTERNS:
+            match = pattern.search(desc)
             if match:
                 return {
                     "book": match.group(1),
@@ -91,14 +145,8 @@ class LegalDescriptionParser:
         Extract tax parcel ID
         Common formats: 123.45-6-7, 123-45-6, 12-34-567
         """
-        patterns = [
-            r'\b(\d{2,3}[\.-]\d{2}[\.-]\d{1,3}[\.-]\d{1,3})\b',  # 123.45-6-7
-            r'\b(\d{2,3}[\.-]\d{2}[\.-]\d{1,3})\b',              # 123-45-6
-            r'[Tt]ax\s+[Pp]arcel\s*:?\s*([0-9\.-]+)',            # Tax Parcel: 123-45-6
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, desc)
+        for pattern in _TAX_PARCEL_PATTERNS:
+            match = pattern.search(desc)
             if match:
                 return match.group(1)
         
@@ -111,12 +159,16 @@ class LegalDescriptionParser:
         Excludes: measurements like "lot 20.06 feet", "lot 21.05 feet"
         """
         lots = []
+        # The description is scanned once for where a lot pattern could
+        # start, and each pattern is only tried there
+        starts = [match.start() for match in _LOT_START_RE.finditer(desc)]
+        if not starts:
+            return lots
         
         # Pattern 1: "Lot 152" or "Lot Number 152"
         # But NOT "lot 20.06 feet" or "lot 21 feet"
         # Only match when number immediately follows Lot/Number
-        pattern1 = r'\bLots?\s+(?:Number\s+)?(\d{1,4})(?!\d)(?!\s*\.\d)(?!\s*(?:feet|foot|ft))'
-        matches = re.finditer(pattern1, desc, re.IGNORECASE)
+        matches = _matches_at(_LOT_RE, desc, starts)
         for match in matches:
             lot_num = int(match.group(1))
             # Only accept typical lot numbers (1-9999)
@@ -125,11 +177,11 @@ class LegalDescriptionParser:
         
         # Pattern 2: "Lots 10, 11 and 12" (comma-separated list)
         # More strict - must have "Lots" (plural) followed by comma-separated numbers
-        pattern2 = r'\bLots\s+((?:\d+\s*(?:,|and|&)\s*)+\d+)(?!\s*(?:feet|foot|ft))'
-        matches = re.finditer(pattern2, desc, re.IGNORECASE)
+        matches = _matches_at(_LOT_LIST_RE, desc, starts)
         for match in matches:
-            # Extract all numbers from the match
-            numbers = re.findall(r'\b(\d+)\b', match.group(1))
+            # Extract all numbers from the match, scanning that span of desc
+            # in place rather than a copy of it
+            numbers = _WORD_NUMBER_RE.findall(desc, match.start(1), match.end(1))
             for n in numbers:
                 lot_num = int(n)
                 if 1 <= lot_num < 10000:
@@ -137,8 +189,7 @@ class LegalDescriptionParser:
         
         # Pattern 3: Written numbers "Lot One Hundred Fifty-Two (152)"
         # Only extract the number in parentheses
-        pattern3 = r'\bLots?\s+[A-Za-z][A-Za-z\s\-]*\((\d+)\)'
-        matches = re.finditer(pattern3, desc, re.IGNORECASE)
+        matches = _matches_at(_LOT_WRITTEN_RE, desc, starts)
         for match in matches:
             lot_num = int(match.group(1))
             if 1 <= lot_num < 10000:
@@ -153,11 +204,10 @@ class LegalDescriptionParser:
         """
         blocks = []
         
-        pattern = r'\bBlocks?\s+(\d+(?:\s*(?:,|and|&)\s*\d+)*)'
-        matches = re.finditer(pattern, desc, re.IGNORECASE)
+        matches = _BLOCK_RE.finditer(desc)
         for match in matches:
-            numbers = re.findall(r'\d+', match.group(1))
-            blocks.extend([int(n) for n in numbers])
+            numbers = _NUMBER_RE.findall(desc, match.start(1), match.end(1))
+            blocks.extend(map(int, numbers))
         
         return sorted(list(set(blocks)))
     
@@ -167,8 +217,7 @@ class LegalDescriptionParser:
         Examples: "123 Main Street", "456 Oak Avenue"
         """
         # Pattern: number + street name + street type
-        pattern = r'\b(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd|Way|Court|Ct))\b'
-        match = re.search(pattern, desc, re.IGNORECASE)
+        match = _STREET_ADDRESS_RE.search(desc)
         
         if match:
             return match.group(1).strip()
@@ -181,13 +230,8 @@ class LegalDescriptionParser:
         Examples: "Genesee Manor Section D", "Oak Hill Estates"
         """
         # Common patterns
-        patterns = [
-            r'([A-Z][A-Za-z\s]+(?:Manor|Estates|Heights|Hills|Park|Gardens|Acres|Subdivision)(?:\s+Section\s+["\']?[A-Z0-9]["\']?)?)',
-            r'map\s+of\s+(?:the\s+)?([A-Z][A-Za-z\s]+(?:Manor|Estates)(?:\s+Section\s+["\']?[A-Z0-9]["\']?)?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, desc)
+        for pattern in _SUBDIVISION_PATTERNS:
+            match = pattern.search(desc)
             if match:
                 return match.group(1).strip()
         
@@ -198,8 +242,7 @@ class LegalDescriptionParser:
         Extract map filing reference
         Example: "filed in County Clerk's Office August 28, 1925"
         """
-        pattern = r'filed\s+(?:in\s+)?[^.]*?(?:Clerk|County|Office)[^.]*?(?:\d{4})'
-        match = re.search(pattern, desc, re.IGNORECASE)
+        match = _MAP_REFERENCE_RE.search(desc)
         
         if match:
             return match.group(0).strip()
@@ -233,26 +276,49 @@ class LegalDescriptionParser:
         5. Street address
         6. Subdivision
         """
+        return self.compare_signatures(self.signature(desc_a), self.signature(desc_b))
+    
+    def signature(self, parsed: Dict) -> Dict:
+        """
+        The fields of a parsed description that compare looks at, normalized
+        the way it compares them
+        Each field is None when the description doesn't have it
+        """
+        metes = parsed.get('metes_bounds')
+        start = metes.get('starting_point', '') if metes else None
+        ref = parsed.get('deed_reference')
+        addr = parsed.get('street_address')
+        sub = parsed.get('subdivision')
+        
+        return {
+            'metes_bounds': bool(metes),
+            'starting_point': start.lower().strip() if start else None,
+            'deed_reference': (ref['book'], ref['page']) if ref else None,
+            'tax_parcel_id': parsed.get('tax_parcel_id') or None,
+            'lot_numbers': frozenset(parsed.get('lot_numbers', [])),
+            'street_address': addr.lower().strip() if addr else None,
+            'subdivision': sub.lower().strip() if sub else None
+        }
+    
+    def compare_signatures(self, sig_a: Dict, sig_b: Dict) -> str:
+        """compare, for the signatures of two parsed descriptions"""
         # Priority 1: Metes & bounds
-        if desc_a.get('metes_bounds') and desc_b.get('metes_bounds'):
+        if sig_a['metes_bounds'] and sig_b['metes_bounds']:
             # If both have metes & bounds, compare starting points
-            start_a = desc_a['metes_bounds'].get('starting_point', '')
-            start_b = desc_b['metes_bounds'].get('starting_point', '')
-            if start_a and start_b and start_a.lower().strip() == start_b.lower().strip():
+            start_a = sig_a['starting_point']
+            if start_a is not None and start_a == sig_b['starting_point']:
                 return "SAME"
             # If different starting points, consider different
             return "DIFFERENT"
         
         # Priority 2: Deed reference
-        ref_a = desc_a.get('deed_reference')
-        ref_b = desc_b.get('deed_reference')
-        if ref_a and ref_b:
-            if ref_a['book'] == ref_b['book'] and ref_a['page'] == ref_b['page']:
-                return "SAME"
+        ref_a = sig_a['deed_reference']
+        if ref_a and ref_a == sig_b['deed_reference']:
+            return "SAME"
         
         # Priority 3: Tax parcel ID
-        tax_a = desc_a.get('tax_parcel_id')
-        tax_b = desc_b.get('tax_parcel_id')
+        tax_a = sig_a['tax_parcel_id']
+        tax_b = sig_b['tax_parcel_id']
         if tax_a and tax_b:
             if tax_a == tax_b:
                 return "SAME"
@@ -260,35 +326,38 @@ class LegalDescriptionParser:
                 return "DIFFERENT"
         
         # Priority 4: Lot numbers
-        lots_a = set(desc_a.get('lot_numbers', []))
-        lots_b = set(desc_b.get('lot_numbers', []))
+        lots_a = sig_a['lot_numbers']
+        lots_b = sig_b['lot_numbers']
         
         if lots_a and lots_b:
-            if lots_a == lots_b:
+            # One intersection decides it: the sets are equal, or one contains
+            # the other, exactly when it is as large as both or one of them
+            common = len(lots_a & lots_b)
+            if common == len(lots_a) == len(lots_b):
                 return "SAME"
-            elif lots_a.issubset(lots_b):
+            elif common == len(lots_a):
                 return "SUBSET"  # A is part of B
-            elif lots_a.issuperset(lots_b):
+            elif common == len(lots_b):
                 return "SUPERSET"  # A includes B plus more
-            elif lots_a.intersection(lots_b):
+            elif common:
                 return "PARTIAL_OVERLAP"
             else:
                 return "DIFFERENT"
         
         # Priority 5: Street address
-        addr_a = desc_a.get('street_address')
-        addr_b = desc_b.get('street_address')
-        if addr_a and addr_b:
-            if addr_a.lower().strip() == addr_b.lower().strip():
+        addr_a = sig_a['street_address']
+        addr_b = sig_b['street_address']
+        if addr_a is not None and addr_b is not None:
+            if addr_a == addr_b:
                 return "SAME"
             else:
                 return "DIFFERENT"
         
         # Priority 6: Subdivision
-        sub_a = desc_a.get('subdivision')
-        sub_b = desc_b.get('subdivision')
-        if sub_a and sub_b:
-            if sub_a.lower().strip() == sub_b.lower().strip():
+        sub_a = sig_a['subdivision']
+        sub_b = sig_b['subdivision']
+        if sub_a is not None and sub_b is not None:
+            if sub_a == sub_b:
                 # Same subdivision but no specific lots = uncertain
                 return "SAME"
             else:
@@ -296,3 +365,63 @@ class LegalDescriptionParser:
         
         # If we can't determine, return DIFFERENT (conservative approach)
         return "DIFFERENT"
+    
+    def match_keys(self, sig: Dict) -> List[tuple]:
+        """
+        Keys of a description's signature for finding what it can match
+        compare returns DIFFERENT for any two descriptions that share none
+        of their keys
+        """
+        keys = []
+        
+        if sig['starting_point'] is not None:
+            keys.append(('metes_bounds', sig['starting_point']))
+        
+        if sig['deed_reference']:
+            keys.append(('deed_reference',) + sig['deed_reference'])
+        
+        if sig['tax_parcel_id']:
+            keys.append(('tax_parcel_id', sig['tax_parcel_id']))
+        
+        # Lots only compare as anything but DIFFERENT when they overlap
+        for lot in sig['lot_numbers']:
+            keys.append(('lot', lot))
+        
+        for field in ('street_address', 'subdivision'):
+            if sig[field] is not None:
+                keys.append((field, sig[field]))
+        
+        return keys
+
+
+def _matches_at(pattern, desc: str, starts: List[int]):
+    """
+    pattern.finditer(desc), for a pattern that can only match at the given
+    ascending positions: each is tried in turn, skipping those inside the
+    previous match
+    """
+    end = 0
+    for start in starts:
+        if start < end:
+            continue
+        match = pattern.match(desc, start)
+        if match:
+            yield match
+            end = match.end()
+
+
+@lru_cache(maxsize=1024)
+def _parse_cached(desc: str) -> Dict:
+    """LegalDescriptionParser._parse; never handed out, only copies of it"""
+    return LegalDescriptionParser()._parse(desc)
+
+
+def _copy_result(result: Dict) -> Dict:
+    """A copy of a parse result that shares nothing mutable with it"""
+    result = dict(result)
+    for key in ('metes_bounds', 'deed_reference'):
+        if result[key] is not None:
+            result[key] = dict(result[key])
+    result['lot_numbers'] = list(result['lot_numbers'])
+    result['block_numbers'] = list(result['block_numbers'])
+    return result
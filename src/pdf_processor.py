@@ -1,13 +1,43 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
-from typing import List
+from typing import Iterable, Iterator, List
+import os
 
 class PDFProcessor:
     def __init__(self):
         self.dpi = 300
-        
-    def pdf_to_images(self, pdf_path: str) -> List[Image.Image]:
+        self.max_workers = os.cpu_count() or 1
+
+    def get_page_count(self, pdf_path: str) -> int:
         try:
-            return convert_from_path(pdf_path, dpi=self.dpi, fmt='png')
+            return pdfinfo_from_path(pdf_path)['Pages']
+        except Exception as e:
+            raise Exception(f"PDF info error: {str(e)}")
+
+    def pdf_to_images(self, pdf_path: str, out_dir: str) -> List[str]:
+        """
+        Rasterize every page to a JPEG file in out_dir, returning the paths
+        in page order. Pages are written straight to disk instead of being
+        held in memory; open them one at a time with iter_pages
+        """
+        try:
+            # pdf2image splits the pages into one contiguous range per thread,
+            # each rasterized by a single pdftoppm run, so the PDF is opened
+            # once per core rather than once per page; pages stay in order
+            return convert_from_path(
+                pdf_path,
+                dpi=self.dpi,
+                fmt='jpeg',
+                jpegopt={'quality': 85, 'progressive': True},
+                output_folder=out_dir,
+                paths_only=True,
+                thread_count=self.max_workers
+            )
         except Exception as e:
             raise Exception(f"PDF conversion error: {str(e)}")
+
+    def iter_pages(self, paths: Iterable[str]) -> Iterator[Image.Image]:
+        """Open each page image in turn, closing it before the next is opened"""
+        for path in paths:
+            with Image.open(path) as image:
+                yield image
@@ -1,5 +1,6 @@
 from typing import List, Dict, Tuple
 from src.legal_description_parser import LegalDescriptionParser
+from src.date_parsing import date_sort_key
 
 class RelationshipDetector:
     """
@@ -27,16 +28,35 @@ class RelationshipDetector:
             }
         
         # Step 2: Build relationship matrix
+        # Each description's signature is computed once. Documents are indexed
+        # by their match keys, so only pairs sharing one are compared; every
+        # other pair is DIFFERENT
+        signatures = {}
+        keys_by_doc = {}
+        docs_by_key = {}
+        for doc_id, data in parsed_descriptions.items():
+            signatures[doc_id] = self.parser.signature(data['parsed'])
+            keys_by_doc[doc_id] = self.parser.match_keys(signatures[doc_id])
+            for key in keys_by_doc[doc_id]:
+                docs_by_key.setdefault(key, []).append(doc_id)
+        
         relationships = []
         for doc_a_id, data_a in parsed_descriptions.items():
+            candidates = set()
+            for key in keys_by_doc[doc_a_id]:
+                candidates.update(docs_by_key[key])
+            
             for doc_b_id, data_b in parsed_descriptions.items():
                 if doc_a_id >= doc_b_id:
                     continue  # Skip self and already compared pairs
                 
-                relationship = self.parser.compare(
-                    data_a['parsed'],
-                    data_b['parsed']
-                )
+                if doc_b_id in candidates:
+                    relationship = self.parser.compare_signatures(
+                        signatures[doc_a_id],
+                        signatures[doc_b_id]
+                    )
+                else:
+                    relationship = "DIFFERENT"
                 
                 relationships.append({
                     'doc_a': doc_a_id,
@@ -62,6 +82,8 @@ class RelationshipDetector:
         # Group documents by SAME or SUBSET relationships
         chain_groups = {}
         processed = set()
+        # Document -> number of the earliest created chain listing it
+        first_chain = {}
         
         # Start with documents that have SAME relationships
         for rel in relationships:
@@ -69,21 +91,22 @@ class RelationshipDetector:
                 doc_a = rel['doc_a']
                 doc_b = rel['doc_b']
                 
-                # Find which chain they belong to
-                chain_id = None
-                for cid, members in chain_groups.items():
-                    if doc_a in members or doc_b in members:
-                        chain_id = cid
-                        break
+                # Find which chain they belong to: the first one listing either
+                listing = [first_chain[d] for d in (doc_a, doc_b) if d in first_chain]
                 
-                if chain_id:
+                if listing:
+                    chain_num = min(listing)
+                    chain_id = f"chain_{chain_num}"
                     chain_groups[chain_id].add(doc_a)
                     chain_groups[chain_id].add(doc_b)
                 else:
                     # Create new chain
-                    chain_id = f"chain_{len(chain_groups) + 1}"
+                    chain_num = len(chain_groups) + 1
+                    chain_id = f"chain_{chain_num}"
                     chain_groups[chain_id] = {doc_a, doc_b}
                 
+                for d in (doc_a, doc_b):
+                    first_chain[d] = min(first_chain.get(d, chain_num), chain_num)
                 processed.add(doc_a)
                 processed.add(doc_b)
         
@@ -104,23 +127,27 @@ class RelationshipDetector:
         
         # Convert to chain objects
         chains = []
+        # doc_id -> (record date, sort key), shared by the chains listing it
+        date_keys = {}
         for chain_id, doc_ids in chain_groups.items():
+            # Members stay a set while the chain is built; the sorted list is
+            # only for the output
+            document_ids = sorted(doc_ids)
+            
             # Get property description from first doc
-            first_doc_id = min(doc_ids)
+            first_doc_id = document_ids[0]
             parsed = parsed_descriptions[first_doc_id]['parsed']
             
             # Build property description
             property_desc = self._build_property_description(parsed)
             
-            # Get first owner (grantor of earliest deed)
-            first_owner = self._get_first_owner(doc_ids, parsed_descriptions)
-            
-            # Get earliest date for sorting
-            earliest_date = self._get_earliest_date(doc_ids, parsed_descriptions)
+            # Get earliest date for sorting, and first owner (grantor of
+            # earliest deed)
+            earliest_date, first_owner = self._chain_head(doc_ids, parsed_descriptions, date_keys)
             
             chains.append({
                 'chain_id': chain_id,
-                'document_ids': sorted(list(doc_ids)),
+                'document_ids': document_ids,
                 'property_description': property_desc,
                 'first_owner': first_owner,
                 'earliest_date': earliest_date,
@@ -173,77 +200,54 @@ class RelationshipDetector:
         
         return ', '.join(parts) if parts else "Property description unavailable"
     
-    def _get_first_owner(self, doc_ids: set, parsed_descriptions: Dict) -> str:
-        """Get the first owner (grantor of earliest deed) in the chain"""
-        # Sort by record date
-        docs_with_dates = []
+    def _chain_head(self, doc_ids: set, parsed_descriptions: Dict, date_keys: Dict) -> Tuple[str, str]:
+        """
+        (earliest record date, first owner) of the chain: the first owner is
+        the grantor of the earliest document, found in the same pass
+        date_keys caches each document's (record date, sort key) by doc_id
+        """
+        first_key = first_doc = None
+        earliest_key = earliest_date = None
         for doc_id in doc_ids:
             doc = parsed_descriptions[doc_id]['doc']
-            date_str = doc.get('dates', {}).get('recordDate', '')
-            docs_with_dates.append((doc_id, date_str, doc))
-        
-        # Sort by date (convert to comparable format)
-        docs_with_dates.sort(key=lambda x: self._date_sort_key(x[1]))
+            # A document can be in several chains; its record date and sort
+            # key are read the first time it is seen
+            if doc_id not in date_keys:
+                date_str = doc.get('dates', {}).get('recordDate', '')
+                date_keys[doc_id] = (date_str, self._date_sort_key(date_str))
+            date_str, key = date_keys[doc_id]
+            
+            # Ties keep the first document seen, as a stable sort would
+            if first_key is None or key < first_key:
+                first_key, first_doc = key, doc
+            if date_str and (earliest_key is None or key < earliest_key):
+                earliest_key, earliest_date = key, date_str
         
-        if docs_with_dates:
-            first_doc = docs_with_dates[0][2]
+        first_owner = "Unknown"
+        if first_doc is not None:
             from_parties = first_doc.get('parties', {}).get('from', [])
             if from_parties:
-                return from_parties[0] if isinstance(from_parties, list) else str(from_parties)
+                first_owner = from_parties[0] if isinstance(from_parties, list) else str(from_parties)
         
-        return "Unknown"
-    
-    def _get_earliest_date(self, doc_ids: set, parsed_descriptions: Dict) -> str:
-        """Get the earliest record date in the chain for sorting"""
-        dates = []
-        for doc_id in doc_ids:
-            doc = parsed_descriptions[doc_id]['doc']
-            date_str = doc.get('dates', {}).get('recordDate', '')
-            if date_str:
-                dates.append(date_str)
-        
-        if dates:
-            dates.sort(key=self._date_sort_key)
-            return dates[0]
-        
-        return "Unknown"
+        return earliest_date or "Unknown", first_owner
     
     def _date_sort_key(self, date_str: str) -> tuple:
         """Convert date string to sortable tuple"""
-        import re
-        from datetime import datetime
-        
-        if not date_str or date_str == "Unknown":
-            return (9999, 12, 31)  # Sort unknowns to end
-        
-        # Try parsing "Month DD, YYYY" format
-        try:
-            dt = datetime.strptime(date_str, "%B %d, %Y")
-            return (dt.year, dt.month, dt.day)
-        except:
-            pass
-        
-        # Try other common formats
-        for fmt in ["%m/%d/%Y", "%Y-%m-%d", "%B %d %Y"]:
-            try:
-                dt = datetime.strptime(date_str, fmt)
-                return (dt.year, dt.month, dt.day)
-            except:
-                continue
-        
-        # If all else fails, try to extract year
-        year_match = re.search(r'\b(19|20)\d{2}\b', date_str)
-        if year_match:
-            year = int(year_match.group(0))
-            return (year, 1, 1)
-        
-        return (9999, 12, 31)
+        return date_sort_key(date_str)
     
     def _detect_splits(self, chains: List[Dict], parent_child_rels: List[Dict], parsed_descriptions: Dict) -> List[Dict]:
         """
         Detect parent-child relationships (property splits)
         Mark chains that are splits from larger parcels
         """
+        # Document -> the last chain listing it (a document can be in more than one)
+        doc_to_chain = {}
+        for chain in chains:
+            for doc_id in chain['document_ids']:
+                doc_to_chain[doc_id] = chain
+        # Chain id -> its children so far, for the membership check
+        children = {chain['chain_id']: set(chain['children']) for chain in chains}
+        
         # For each SUBSET relationship, mark the subset as a child
         for rel in parent_child_rels:
             if rel['relationship'] == 'SUBSET':
@@ -258,19 +262,14 @@ class RelationshipDetector:
                 continue
             
             # Find which chains these belong to
-            subset_chain = None
-            superset_chain = None
-            
-            for chain in chains:
-                if subset_doc in chain['document_ids']:
-                    subset_chain = chain
-                if superset_doc in chain['document_ids']:
-                    superset_chain = chain
+            subset_chain = doc_to_chain.get(subset_doc)
+            superset_chain = doc_to_chain.get(superset_doc)
             
             # Mark relationship
             if subset_chain and superset_chain and subset_chain != superset_chain:
                 subset_chain['parent'] = superset_chain['chain_id']
-                if subset_chain['chain_id'] not in superset_chain['children']:
+                if subset_chain['chain_id'] not in children[superset_chain['chain_id']]:
+                    children[superset_chain['chain_id']].add(subset_chain['chain_id'])
                     superset_chain['children'].append(subset_chain['chain_id'])
         
         return chains
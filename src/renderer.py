@@ -4,15 +4,44 @@ def _to_str(x):
     """Convert value to string, handling None, dicts, and primitives"""
     if x is None or x == "":
         return ""
-    if isinstance(x, str):
-        return x  # Return strings as-is
-    if isinstance(x, (int, float, bool)):
-        return str(x)
-    if isinstance(x, dict):
-        return x.get("name") or x.get("value") or str(x)
-    if isinstance(x, (list, tuple)):
-        return "; ".join([_to_str(i) for i in x if _to_str(i)])
-    return str(x)
+    convert = _CONVERTERS.get(type(x))
+    if convert is None:
+        # Subclasses of the handled types convert like them; anything else
+        # is just str()
+        convert = next((f for t, f in _CONVERTERS.items() if isinstance(x, t)), str)
+    return convert(x)
+
+def _dict_to_str(x):
+    return x.get("name") or x.get("value") or str(x)
+
+def _seq_to_str(x):
+    return "; ".join([s for s in map(_to_str, x) if s])
+
+# Type -> its conversion in _to_str, in the order the types are checked for
+# subclasses. str() of a str is the string itself
+_CONVERTERS = {
+    str: str,
+    int: str,
+    float: str,
+    bool: str,
+    dict: _dict_to_str,
+    list: _seq_to_str,
+    tuple: _seq_to_str,
+}
+
+# The fixed rows of an entry's details table, filled from its dates and
+# recording; a missing field shows as N/A
+_TABLE_TEMPLATE = (
+    "| Field | Value |\n"
+    "|:------|:------|\n"
+    "| **Instrument Date** | {instrumentDate} |\n"
+    "| **Acknowledged Date** | {acknowledgedDate} |\n"
+    "| **Record Date** | {recordDate} |\n"
+    "| **Instrument Location** | {locationInstrumentNumber} |\n"
+    "| **County** | {county} |\n"
+)
+_TABLE_DATES = ('instrumentDate', 'acknowledgedDate', 'recordDate')
+_TABLE_RECORDING = ('locationInstrumentNumber', 'county')
 
 def _fmt_names(names, aka_list=None):
     """Format party names with aka"""
@@ -56,25 +85,21 @@ def render_entry_md(doc, n):
     parties_block = f"**{from_label}:** {from_names}  \n**{to_label}:** {to_names}\n\n"
     
     # Key details table
-    table = (
-        "| Field | Value |\n"
-        "|:------|:------|\n"
-        f"| **Instrument Date** | {_to_str(dts.get('instrumentDate','N/A'))} |\n"
-        f"| **Acknowledged Date** | {_to_str(dts.get('acknowledgedDate','N/A'))} |\n"
-        f"| **Record Date** | {_to_str(dts.get('recordDate','N/A'))} |\n"
-        f"| **Instrument Location** | {_to_str(rec.get('locationInstrumentNumber','N/A'))} |\n"
-        f"| **County** | {_to_str(rec.get('county','N/A'))} |\n"
-    )
+    table_values = {key: _to_str(dts.get(key, 'N/A')) for key in _TABLE_DATES}
+    table_values.update((key, _to_str(rec.get(key, 'N/A'))) for key in _TABLE_RECORDING)
+    
+    # The entry is built as a list of fragments and joined once at the end
+    parts = [heading, parties_block, _TABLE_TEMPLATE.format_map(table_values)]
     
     # Add monetary fields if present
     if mon.get('considerationAmount'):
-        table += f"| **Consideration** | {_to_str(mon['considerationAmount'])} |\n"
+        parts.append(f"| **Consideration** | {_to_str(mon['considerationAmount'])} |\n")
     if mon.get('mortgageAmount'):
-        table += f"| **Mortgage Amount** | {_to_str(mon['mortgageAmount'])} |\n"
+        parts.append(f"| **Mortgage Amount** | {_to_str(mon['mortgageAmount'])} |\n")
     if mon.get('transferTaxes'):
-        table += f"| **Transfer Taxes** | {_to_str(mon['transferTaxes'])} |\n"
+        parts.append(f"| **Transfer Taxes** | {_to_str(mon['transferTaxes'])} |\n")
     
-    table += "\n"
+    parts.append("\n")
     
     # Property description
     subject_text = _to_str(prop.get("legalDescription", ""))
@@ -86,47 +111,34 @@ def render_entry_md(doc, n):
     if not subject_text:
         subject_text = "N/A"
     
-    property_section = f"### Property Description\n{subject_text}\n\n"
+    parts.append(f"### Property Description\n{subject_text}\n\n")
     
     # Tax Parcel
     if prop.get("taxParcelId"):
-        property_section += f"**Tax Parcel ID:** {_to_str(prop['taxParcelId'])}\n\n"
+        parts.append(f"**Tax Parcel ID:** {_to_str(prop['taxParcelId'])}\n\n")
     
     # Clauses (handle both string and array formats)
-    clauses_section = ""
-    
     if cls.get("beingSamePremises"):
-        clauses_section += f"**Being Same Premises:**  \n{_to_str(cls['beingSamePremises'])}\n\n"
-    
-    # Handle subjectTo as string or array
-    subject_to = cls.get("subjectTo")
-    if subject_to:
-        if isinstance(subject_to, str):
-            clauses_section += f"**Subject To:**  \n{subject_to}\n\n"
-        elif isinstance(subject_to, list) and subject_to:
-            clauses_section += "**Subject To:**\n" + "\n".join([f"- {_to_str(s)}" for s in subject_to]) + "\n\n"
-    
-    # Handle togetherWith as string or array
-    together_with = cls.get("togetherWith")
-    if together_with:
-        if isinstance(together_with, str):
-            clauses_section += f"**Together With:**  \n{together_with}\n\n"
-        elif isinstance(together_with, list) and together_with:
-            clauses_section += "**Together With:**\n" + "\n".join([f"- {_to_str(s)}" for s in together_with]) + "\n\n"
-    
-    # Handle exceptingAndReserving as string or array
-    excepting = cls.get("exceptingAndReserving")
-    if excepting:
-        if isinstance(excepting, str):
-            clauses_section += f"**Excepting and Reserving:**  \n{excepting}\n\n"
-        elif isinstance(excepting, list) and excepting:
-            clauses_section += "**Excepting and Reserving:**\n" + "\n".join([f"- {_to_str(s)}" for s in excepting]) + "\n\n"
+        parts.append(f"**Being Same Premises:**  \n{_to_str(cls['beingSamePremises'])}\n\n")
+    
+    # Handle subjectTo, togetherWith and exceptingAndReserving as string or array
+    for key, label in (("subjectTo", "Subject To"),
+                       ("togetherWith", "Together With"),
+                       ("exceptingAndReserving", "Excepting and Reserving")):
+        clause = cls.get(key)
+        if clause:
+            if isinstance(clause, str):
+                parts.append(f"**{label}:**  \n{clause}\n\n")
+            elif isinstance(clause, list) and clause:
+                parts.append(f"**{label}:**\n")
+                parts.append("\n".join([f"- {_to_str(s)}" for s in clause]))
+                parts.append("\n\n")
     
     # Confidence
     conf = q.get('confidence', 0)
-    quality_section = f"**Confidence:** {conf}%\n\n"
+    parts.append(f"**Confidence:** {conf}%\n\n")
     
-    return heading + parties_block + table + property_section + clauses_section + quality_section
+    return "".join(parts)
 
 def render_markdown(json_payload):
     """Render all documents as markdown"""
@@ -139,6 +151,8 @@ def render_markdown(json_payload):
     for i, doc in enumerate(docs, start=1):
         out.append(render_entry_md(doc, i))
     
-    footer = f"\n---\n\n**Total pages processed:** {json_payload.get('review',{}).get('totalPagesProcessed',0)}"
+    # The footer follows the last entry after the same separator, so it is
+    # joined with them instead of concatenated onto the result
+    out.append(f"**Total pages processed:** {json_payload.get('review',{}).get('totalPagesProcessed',0)}")
     
-    return "\n---\n\n".join(out) + footer
+    return "\n---\n\n".join(out)